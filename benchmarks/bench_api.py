@@ -0,0 +1,242 @@
+# End-to-end benchmark: bulk save, range query and single/batch predict over HTTP
+#
+# Starts uvicorn on the API (or targets --url), drives each scenario with
+# `--concurrency` client threads for `--requests` requests, and reports
+# throughput, p50/p95/p99 latency and server memory. Results are written as
+# JSON (with git commit and parameters) so runs can be compared with
+# benchmarks/compare.py.
+#
+# Needs a local Postgres with the setup.sql schema (AQUA_DB_* variables) and,
+# for the predict scenarios, a model at AQUA_MODEL_PATH.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_api.py --concurrency 1 8 32 --output results.json
+#   python benchmarks/bench_api.py --scenarios predict predict_batch --url http://127.0.0.1:8000
+#   python benchmarks/bench_api.py --scenarios save save_arrow   # JSON vs Arrow IPC ingest
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np  # noqa: E402
+import requests  # noqa: E402
+
+from synthetic import synthetic_payload  # noqa: E402
+
+FAST_API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "fast_api")
+
+
+def arrow_body(rows):
+    """Serialize rows as an Arrow IPC stream (the columnar save format)"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pylist(rows)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def build_scenarios(batch_rows, names):
+    """name -> (method, path, params, body, content type) with bodies serialized once up front"""
+    rows = synthetic_payload(batch_rows)
+    inputs = [{k: v for k, v in row.items() if k != "prediction"} for row in rows]
+    today = date.today()
+    scenarios = {
+        "save": ("POST", "/save_predictions/", None, json.dumps(rows), "application/json"),
+        "query": (
+            "GET", "/get_predictions/",
+            {"start_date": (today - timedelta(days=7)).isoformat(),
+             "end_date": today.isoformat(), "limit": 1000},
+            None, None,
+        ),
+        "predict": ("POST", "/predict", None, json.dumps(inputs[0]), "application/json"),
+        "predict_batch": ("POST", "/predict_batch", None, json.dumps(inputs), "application/json"),
+    }
+    if "save_arrow" in names:
+        scenarios["save_arrow"] = (
+            "POST", "/save_predictions/", None, arrow_body(rows),
+            "application/vnd.apache.arrow.stream",
+        )
+    return scenarios
+
+
+def server_rss_kb(pid):
+    """Resident memory of a process and its children from /proc (Linux)"""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except FileNotFoundError:
+            continue
+    return total
+
+
+class MemorySampler:
+    """Samples the server's RSS in the background and keeps the peak"""
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, server_rss_kb(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if self.pid is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+def start_server(port, workers):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "fast_api:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=FAST_API_DIR,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url + "/health", timeout=1).status_code == 200:
+                return process, url
+        except requests.ConnectionError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 60s")
+
+
+def run_scenario(url, scenario, concurrency, total_requests):
+    method, path, params, body, content_type = scenario
+    local = threading.local()
+    headers = {"Content-Type": content_type} if content_type else {}
+
+    def one_request(_):
+        # One keep-alive session per client thread
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        response = session.request(method, url + path, params=params, data=body, headers=headers)
+        response.content  # read the whole body, including streamed ones
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        samples = list(pool.map(one_request, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, status in samples if status < 400])
+    errors = sum(1 for _, status in samples if status >= 400)
+    p50, p95, p99 = (np.percentile(latencies, [50, 95, 99]) * 1000 if len(latencies)
+                     else (float("nan"),) * 3)
+    return {
+        "requests": total_requests,
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_sec": total_requests / elapsed,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end API benchmark")
+    parser.add_argument("--scenarios", nargs="+", default=["save", "query", "predict", "predict_batch"],
+                        choices=["save", "save_arrow", "query", "predict", "predict_batch"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario and concurrency")
+    parser.add_argument("--batch-rows", type=int, default=1000, help="rows per save / predict_batch request")
+    parser.add_argument("--url", help="benchmark a running server instead of starting uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.batch_rows, args.scenarios)
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args.port, args.workers)
+
+    results = []
+    try:
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                # Warm-up: connections, model pages and plan cache
+                run_scenario(url, scenarios[name], concurrency, min(concurrency, args.requests))
+                with MemorySampler(process.pid if process else None) as memory:
+                    result = run_scenario(url, scenarios[name], concurrency, args.requests)
+                rows = args.batch_rows if name in ("save", "save_arrow", "predict_batch") else None
+                result.update(
+                    scenario=name,
+                    concurrency=concurrency,
+                    rows_per_request=rows,
+                    server_peak_rss_mb=memory.peak_kb / 1024 if process else None,
+                )
+                results.append(result)
+                print(
+                    f"{name:>14} c={concurrency:<4} {result['requests_per_sec']:9,.1f} req/s  "
+                    f"p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                    f"p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}"
+                )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "commit": git_commit(),
+                    "started_at": datetime.now().isoformat(),
+                    "python": platform.python_version(),
+                    "cpu_count": os.cpu_count(),
+                    "params": vars(args),
+                    "results": results,
+                },
+                f, indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
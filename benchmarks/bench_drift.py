@@ -0,0 +1,110 @@
+# Benchmark: incremental drift counts vs recomputing from every saved row
+#
+# Streams synthetic batches into a DriftMonitor the way /save_predictions/
+# does and times `observe` per batch and `report` per call. The "rescan"
+# column is what a recompute over all rows saved so far would cost at the
+# same point (binning the whole history again), which grows with the table.
+# A second stream with shifted pH and more "Brown" water checks that the
+# scores flag the drifted features and leave the rest stable.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_drift.py --batches 200 --batch-rows 5000
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from drift import DriftMonitor, build_baseline  # noqa: E402
+from preprocessing import CATEGORIES, FEATURE_ORDER  # noqa: E402
+from synthetic import synthetic_frame  # noqa: E402
+
+
+def baseline_for(frame):
+    categories = {name: sorted(frame[name].unique()) for name in CATEGORIES}
+    columns = {name: frame[name].to_numpy() for name in FEATURE_ORDER}
+    return build_baseline(columns, categories, frame["prediction"].to_numpy(), [0, 1])
+
+
+def batch_columns(frame):
+    return {name: frame[name].to_numpy() for name in frame.columns}
+
+
+def drifted(frame, seed):
+    rng = np.random.default_rng(seed)
+    frame = frame.copy()
+    frame["ph"] = frame["ph"] + 1.0
+    brown = rng.random(len(frame)) < 0.3
+    frame.loc[brown, "color"] = "Brown"
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time incremental drift monitoring")
+    parser.add_argument("--baseline-rows", type=int, default=100_000)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-rows", type=int, default=5_000)
+    parser.add_argument("--reports", type=int, default=100, help="report calls to time")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    baseline = baseline_for(synthetic_frame(args.baseline_rows, seed=7))
+    monitor = DriftMonitor(baseline)
+    batch = synthetic_frame(args.batch_rows, seed=11)
+    columns = batch_columns(batch)
+
+    observe_seconds = np.empty(args.batches)
+    for i in range(args.batches):
+        started = time.perf_counter()
+        monitor.observe(columns)
+        observe_seconds[i] = time.perf_counter() - started
+
+    # A rescan bins every row saved so far, once per batch
+    history = DriftMonitor(baseline)
+    history_columns = batch_columns(pd.concat([batch] * args.batches, ignore_index=True))
+    started = time.perf_counter()
+    history.observe(history_columns)
+    rescan_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(args.reports):
+        report = monitor.report()
+    report_ms = (time.perf_counter() - started) / args.reports * 1000
+
+    shifted = DriftMonitor(baseline)
+    shifted.observe(batch_columns(drifted(batch, seed=3)))
+    shifted_report = shifted.report()
+
+    total_rows = args.batches * args.batch_rows
+    results = {
+        "batch_rows": args.batch_rows,
+        "batches": args.batches,
+        "observe_p50_ms": float(np.percentile(observe_seconds, 50) * 1000),
+        "observe_p99_ms": float(np.percentile(observe_seconds, 99) * 1000),
+        "observe_rows_per_sec": total_rows / observe_seconds.sum(),
+        "rescan_ms_at_end": rescan_seconds * 1000,
+        "report_ms": report_ms,
+        "same_distribution": {"status": report["status"], "max_psi": report["max_psi"]},
+        "shifted": {name: entry["status"] for name, entry in shifted_report["features"].items()
+                    if entry["status"] != "stable"},
+    }
+    print(f"observe  p50 {results['observe_p50_ms']:7.3f} ms  p99 {results['observe_p99_ms']:7.3f} ms  "
+          f"{results['observe_rows_per_sec']:12,.0f} rows/s")
+    print(f"rescan of {total_rows:,} rows at the last batch {results['rescan_ms_at_end']:9.1f} ms")
+    print(f"report   {report_ms:7.3f} ms")
+    print(f"same distribution: {report['status']} (max PSI {report['max_psi']:.4f})")
+    print(f"shifted stream flags: {results['shifted']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
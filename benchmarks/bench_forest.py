@@ -0,0 +1,129 @@
+# Benchmark: compiled forest vs sklearn predict, with a bit-for-bit parity check
+#
+# Measures single-row latency (p50/p99 over --single-calls calls) and batch
+# throughput for sklearn's RandomForestClassifier, the flattened node tables
+# alone ("tables") and CompiledForest as served ("compiled": the tables up to
+# ForestConfig.MAX_ROWS rows per call, sklearn above), after checking that
+# the tables give identical probabilities and classes on every benchmark row.
+# A sweep over --batch-sizes shows where the tables stop paying off, which is
+# what MAX_ROWS should be set to. Exits non-zero on any mismatch.
+# Without --model, a forest with the training defaults (100 unpruned trees)
+# is fit on synthetic rows.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_forest.py --rows 200000 --single-calls 2000
+#   python benchmarks/bench_forest.py --batch-sizes 16 64 256 1024 10000
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+
+from forest import CompiledForest, check_parity  # noqa: E402
+from model_store import load_model  # noqa: E402
+from preprocessing import encode_frame  # noqa: E402
+from synthetic import synthetic_frame  # noqa: E402
+
+
+def single_row_latency(predict, features, calls):
+    samples = np.empty(calls)
+    for i in range(calls):
+        row = features[i % len(features)][np.newaxis, :]
+        started = time.perf_counter()
+        predict(row)
+        samples[i] = time.perf_counter() - started
+    return np.percentile(samples, [50, 99]) * 1000
+
+
+def batch_throughput(predict, features):
+    started = time.perf_counter()
+    predict(features)
+    return len(features) / (time.perf_counter() - started)
+
+
+def batch_seconds(predict, features, batch_rows, min_seconds=0.5):
+    # Mean seconds per call on consecutive slices of `batch_rows` rows
+    calls, started = 0, time.perf_counter()
+    while calls == 0 or time.perf_counter() - started < min_seconds:
+        start = (calls * batch_rows) % max(len(features) - batch_rows, 1)
+        predict(features[start:start + batch_rows])
+        calls += 1
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare compiled forest and sklearn inference")
+    parser.add_argument("--rows", type=int, default=200_000, help="rows for the batch run and parity check")
+    parser.add_argument("--single-calls", type=int, default=2_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[16, 64, 256, 1024, 10_000],
+                        help="rows per call for the batch-size sweep")
+    parser.add_argument("--model", help="joblib artifact to compile (default: train one)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.model:
+        model = load_model(args.model)
+    else:
+        frame = synthetic_frame(50_000, seed=7)
+        model = RandomForestClassifier(random_state=21, n_jobs=-1)
+        model.fit(encode_frame(frame), frame["prediction"])
+    # Parity is defined against sklearn's sequential (single-thread) summation
+    model.n_jobs = 1
+
+    started = time.perf_counter()
+    compiled = CompiledForest(model)
+    compile_seconds = time.perf_counter() - started
+    tables = CompiledForest(model, max_rows=None)
+    print(f"Compiled {compiled.stats()} in {compile_seconds:.2f}s")
+
+    features = encode_frame(synthetic_frame(args.rows, seed=11))
+    parity = check_parity(model, compiled, features)
+    # Some NaNs exercise the missing-value routing (sklearn >= 1.4 accepts them)
+    with_missing = features.copy()
+    with_missing[::97, 0] = np.nan
+    try:
+        parity = parity and check_parity(model, compiled, with_missing)
+    except ValueError as e:
+        print(f"Skipping the missing-value parity check: {e}")
+    print(f"Parity on {args.rows:,} rows: {'identical' if parity else 'MISMATCH'}")
+
+    results = []
+    predictors = (("sklearn", model), ("tables", tables), ("compiled", compiled))
+    for name, predictor in predictors:
+        p50, p99 = single_row_latency(predictor.predict, features, args.single_calls)
+        rows_per_sec = batch_throughput(predictor.predict, features)
+        results.append({
+            "predictor": name,
+            "single_p50_ms": float(p50),
+            "single_p99_ms": float(p99),
+            "batch_rows": args.rows,
+            "batch_rows_per_sec": rows_per_sec,
+        })
+        print(f"{name:>9}  single p50 {p50:7.3f} ms  p99 {p99:7.3f} ms  "
+              f"batch {rows_per_sec:12,.0f} rows/s")
+
+    sweep = []
+    for batch_rows in args.batch_sizes:
+        row = {"batch_rows": batch_rows}
+        for name, predictor in predictors:
+            row[f"{name}_ms"] = batch_seconds(predictor.predict, features, batch_rows) * 1000
+        sweep.append(row)
+        print(f"{batch_rows:>9} rows/call  " + "  ".join(
+            f"{name} {row[f'{name}_ms']:9.3f} ms" for name, _ in predictors))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"parity": parity, "compile_seconds": compile_seconds,
+                       "forest": compiled.stats(), "results": results, "batch_sizes": sweep}, f, indent=2)
+    if not parity:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# Benchmark: executemany vs COPY vs execute_values for saving predictions
+#
+# "copy_validated" runs the API's data-quality checks (whole-column rules,
+# good/bad split) before the COPY, to show what validation adds to ingest.
+#
+# Usage (from the repository root, against a disposable database):
+#   python benchmarks/bench_ingest.py --sizes 1000 100000 1000000
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import psycopg2  # noqa: E402
+
+from db import DatabaseConfig  # noqa: E402
+from bulk_ingest import PREDICTION_COLUMNS, bulk_insert  # noqa: E402
+from synthetic import synthetic_rows  # noqa: E402
+from validation import RowValidator, row_columns, split_rows  # noqa: E402
+
+SCRATCH_TABLE = "bench_predictions"
+
+EXECUTEMANY_QUERY = f"""
+    INSERT INTO {SCRATCH_TABLE} ({", ".join(PREDICTION_COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(PREDICTION_COLUMNS))})
+"""
+
+
+def connect():
+    return psycopg2.connect(
+        host=DatabaseConfig.HOST,
+        port=DatabaseConfig.PORT,
+        user=DatabaseConfig.USER,
+        password=DatabaseConfig.PASSWORD,
+        dbname=DatabaseConfig.DBNAME,
+    )
+
+
+def reset_table(conn):
+    # Unlogged copy of `predictions` so the benchmark leaves no trace. The
+    # copied id default would draw from predictions_id_seq, so the scratch
+    # table gets its own identity sequence (dropped along with it)
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        cur.execute(
+            f"CREATE UNLOGGED TABLE {SCRATCH_TABLE} "
+            "(LIKE predictions INCLUDING DEFAULTS)"
+        )
+        cur.execute(
+            f"ALTER TABLE {SCRATCH_TABLE} "
+            "ALTER COLUMN id DROP DEFAULT, "
+            "ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY"
+        )
+    conn.commit()
+
+
+def run_executemany(conn, rows):
+    with conn.cursor() as cur:
+        cur.executemany(EXECUTEMANY_QUERY, rows)
+
+
+def run_bulk(method):
+    def run(conn, rows):
+        return bulk_insert(conn, rows, table=SCRATCH_TABLE, method=method)
+    return run
+
+
+def run_validated(conn, rows):
+    validator = RowValidator()
+    result = validator.validate(row_columns(rows), PREDICTION_COLUMNS)
+    good, _ = split_rows(rows, result)
+    return bulk_insert(conn, good, table=SCRATCH_TABLE, method="copy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prediction ingest methods")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument(
+        "--max-executemany", type=int, default=100_000,
+        help="skip executemany above this row count (it is one round-trip per row)",
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    methods = {
+        "executemany": run_executemany,
+        "copy": run_bulk("copy"),
+        "values": run_bulk("values"),
+        "copy_validated": run_validated,
+    }
+
+    results = []
+    conn = connect()
+    try:
+        for size in args.sizes:
+            rows = synthetic_rows(size)
+            for name, run in methods.items():
+                if name == "executemany" and size > args.max_executemany:
+                    continue
+                reset_table(conn)
+                started = time.perf_counter()
+                run(conn, rows)
+                conn.commit()
+                elapsed = time.perf_counter() - started
+                results.append(
+                    {
+                        "method": name,
+                        "rows": size,
+                        "seconds": elapsed,
+                        "rows_per_sec": size / elapsed,
+                    }
+                )
+                print(f"{name:>14} {size:>9} rows  {elapsed:8.3f}s  {size / elapsed:12,.0f} rows/s")
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+        conn.commit()
+    finally:
+        conn.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Benchmark: model load time and memory per worker, private copy vs memory-mapped
+#
+# Starts N fresh processes that load the model at the same time and hold it,
+# like N Streamlit/API workers. Reports load seconds, RSS and PSS (RSS with
+# shared pages split between the processes sharing them; Linux only).
+# Modes:
+#   sklearn-copy / sklearn-mmap  joblib.load of the forest; sklearn copies the
+#                                tree arrays on unpickling, so mmap shares ~nothing
+#   compiled                     unpickle and compile in every process (private tables)
+#   compiled-mmap                forest.load_tables: .npy tables mapped read-only
+# Without --model, a forest is trained on synthetic rows.
+#
+# Usage (from the repository root; --drop-caches needs root):
+#   python benchmarks/bench_model_load.py --workers 4 --trees 500 --drop-caches
+import argparse
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from forest import CompiledForest, load_tables, save_tables  # noqa: E402
+from model_store import load_model  # noqa: E402
+
+
+MODES = ("sklearn-copy", "sklearn-mmap", "compiled", "compiled-mmap")
+
+
+def memory_kb():
+    # Rss and Pss of the current process from /proc
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                usage[name.lower()] = int(rest.split()[0])
+    return usage
+
+
+def _worker(model_path, mode, barrier, results):
+    started = time.perf_counter()
+    if mode == "compiled-mmap":
+        model = load_tables(model_path, mmap_mode="r")
+    elif mode == "compiled":
+        model = CompiledForest(load_model(model_path, mmap_mode=None))
+    else:
+        model = load_model(model_path, mmap_mode="r" if mode == "sklearn-mmap" else None)
+    elapsed = time.perf_counter() - started
+    # Touch every array the way predict does, so mapped pages are resident
+    if mode.startswith("compiled"):
+        for name in CompiledForest.TABLES:
+            getattr(model, name).sum()
+    else:
+        for tree in model.estimators_:
+            tree.tree_.value.sum()
+    # Measure while every worker holds the model
+    barrier.wait()
+    results.put({"seconds": elapsed, **memory_kb()})
+    barrier.wait()
+
+
+def run_workers(model_path, mode, workers):
+    context = mp.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(model_path, mode, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return samples
+
+
+def train_model(path, trees):
+    from sklearn.ensemble import RandomForestClassifier
+
+    from model_store import save_model
+    from preprocessing import encode_frame
+    from synthetic import synthetic_frame
+
+    frame = synthetic_frame(100_000, seed=7)
+    model = RandomForestClassifier(n_estimators=trees, n_jobs=-1, random_state=21)
+    model.fit(encode_frame(frame), frame["prediction"])
+    save_model(model, path)
+    save_tables(CompiledForest(model), path)
+
+
+def drop_caches():
+    subprocess.run(["sync"], check=True)
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure model cold load time and memory per worker")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--trees", type=int, default=300, help="forest size when training a model")
+    parser.add_argument("--model", help="uncompressed joblib artifact (default: train one)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--drop-caches", action="store_true", help="evict the page cache before each run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        model_path = args.model
+        if model_path is None:
+            model_path = os.path.join(scratch, "bench_model.pkl")
+            train_model(model_path, args.trees)
+        size_mb = os.path.getsize(model_path) / 2**20
+        print(f"Model artifact: {size_mb:,.1f} MB, {args.workers} workers")
+
+        # Older artifacts: save the tables once, as `python fast_api/forest.py` does
+        if load_tables(model_path) is None:
+            save_tables(CompiledForest(load_model(model_path)), model_path)
+
+        results = []
+        for label in args.modes:
+            if args.drop_caches:
+                drop_caches()
+            samples = run_workers(model_path, label, args.workers)
+            result = {
+                "mode": label,
+                "workers": args.workers,
+                "artifact_mb": size_mb,
+                "load_seconds_max": max(s["seconds"] for s in samples),
+                "load_seconds_avg": sum(s["seconds"] for s in samples) / len(samples),
+                "rss_mb_avg": sum(s["rss"] for s in samples) / len(samples) / 1024,
+                "pss_mb_total": sum(s["pss"] for s in samples) / 1024,
+            }
+            results.append(result)
+            print(
+                f"{label:>13}  load avg {result['load_seconds_avg']:7.3f}s  "
+                f"max {result['load_seconds_max']:7.3f}s  "
+                f"RSS/worker {result['rss_mb_avg']:9,.1f} MB  "
+                f"PSS total {result['pss_mb_total']:9,.1f} MB"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# Benchmark: per-row (iterrows) vs whole-column preprocessing of an uploaded CSV
+#
+# Covers what batch_prediction.py does before calling the API: rename columns,
+# fill missing categoricals, encode features and serialize the save payload.
+# The encode_* methods time only the categorical encoding: per-column
+# LabelEncoder.transform vs the persisted CategoryEncoder.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_preprocess.py --sizes 10000 100000 1000000
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np  # noqa: E402
+from sklearn.preprocessing import LabelEncoder  # noqa: E402
+
+from preprocessing import (  # noqa: E402
+    CATEGORIES,
+    CATEGORY_DEFAULTS,
+    CSV_COLUMNS,
+    DEFAULT_ENCODER,
+    FEATURE_ORDER,
+    encode_frame,
+    prepare_frame,
+    to_payload,
+    to_payload_json,
+)
+from synthetic import synthetic_frame  # noqa: E402
+
+API_TO_CSV = {api: csv for csv, api in CSV_COLUMNS.items()}
+
+
+def csv_frame(n):
+    # Synthetic upload with CSV headers, some missing categoricals and no prediction
+    frame = synthetic_frame(n).drop(columns="prediction")
+    frame.loc[frame.index % 50 == 0, "color"] = None
+    return frame.rename(columns=API_TO_CSV)
+
+
+def run_iterrows(raw):
+    # The previous batch_prediction.py code path
+    data = raw.copy()
+    encoders = {}
+    for name, default in CATEGORY_DEFAULTS.items():
+        column = API_TO_CSV[name]
+        data[column] = data[column].fillna(default)
+        encoders[column] = LabelEncoder().fit(CATEGORIES[name])
+    encoded = data.copy()
+    for column, encoder in encoders.items():
+        encoded[column] = encoder.transform(encoded[column])
+    features = encoded[[API_TO_CSV[name] for name in FEATURE_ORDER]].to_numpy(dtype=np.float64)
+
+    data["Prediction"] = 0
+    payload = []
+    for _, row in data.iterrows():
+        payload.append({api: row[csv] for api, csv in API_TO_CSV.items()})
+    return features, json.dumps(payload, default=int)
+
+
+def run_records(raw):
+    frame = prepare_frame(raw)
+    features = encode_frame(frame)
+    return features, json.dumps(to_payload(frame, np.zeros(len(frame), dtype=np.int64)))
+
+
+def run_to_json(raw):
+    frame = prepare_frame(raw)
+    features = encode_frame(frame)
+    return features, to_payload_json(frame, np.zeros(len(frame), dtype=np.int64))
+
+
+def run_encode_labelencoder(raw):
+    frame = prepare_frame(raw)
+    return {
+        name: LabelEncoder().fit(values).transform(frame[name])
+        for name, values in CATEGORIES.items()
+    }
+
+
+def run_encode_category_encoder(raw):
+    frame = prepare_frame(raw)
+    return {name: DEFAULT_ENCODER.codes(name, frame[name]) for name in CATEGORIES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV preprocessing strategies")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument(
+        "--max-iterrows", type=int, default=1_000_000,
+        help="skip iterrows above this row count",
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    methods = {
+        "iterrows": run_iterrows,
+        "to_dict": run_records,
+        "to_json": run_to_json,
+        "encode_labelencoder": run_encode_labelencoder,
+        "encode_category_encoder": run_encode_category_encoder,
+    }
+
+    results = []
+    for size in args.sizes:
+        raw = csv_frame(size)
+        for name, run in methods.items():
+            if name == "iterrows" and size > args.max_iterrows:
+                continue
+            started = time.perf_counter()
+            run(raw)
+            elapsed = time.perf_counter() - started
+            results.append(
+                {
+                    "method": name,
+                    "rows": size,
+                    "seconds": elapsed,
+                    "rows_per_sec": size / elapsed,
+                }
+            )
+            print(f"{name:>24} {size:>9} rows  {elapsed:8.3f}s  {size / elapsed:12,.0f} rows/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
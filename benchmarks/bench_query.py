@@ -0,0 +1,171 @@
+# Benchmark: /get_predictions/ queries on a plain heap vs the monthly partitioned layout
+#
+# Rows are generated server-side with generate_series, so loading 50M rows
+# does not go through Python. Needs a few GB of free disk.
+#
+# Usage (from the repository root, against a disposable database):
+#   python benchmarks/bench_query.py --rows 50000000 --months 24
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+
+import psycopg2  # noqa: E402
+
+from db import DatabaseConfig  # noqa: E402
+from streaming import build_query  # noqa: E402
+
+HEAP_TABLE = "bench_predictions_heap"
+PARTITIONED_TABLE = "bench_predictions_partitioned"
+
+COLUMNS_DDL = """
+    id BIGINT NOT NULL,
+    ph FLOAT, iron FLOAT, nitrate FLOAT, chloride FLOAT, lead FLOAT, zinc FLOAT,
+    color VARCHAR(50), turbidity FLOAT, fluoride FLOAT, copper FLOAT,
+    odor VARCHAR(50), sulfate FLOAT, conductivity FLOAT, chlorine FLOAT,
+    manganese FLOAT, tds FLOAT, source VARCHAR(50), water_temp FLOAT,
+    air_temp FLOAT, month INT, day INT, time_of_day VARCHAR(50), prediction INT,
+    timestamp TIMESTAMP NOT NULL
+"""
+
+# `timestamp` grows with `id` and spans `months` months ending now
+FILL_QUERY = """
+    INSERT INTO {table}
+    SELECT g,
+           7.2 + random() - 0.5, random(), random() * 10, random() * 300,
+           random() / 100, random() * 3,
+           (ARRAY['Clear', 'Brown', 'Yellow', 'Green'])[1 + mod(g, 4)],
+           random(), random(), random(),
+           (ARRAY['Odorless', 'Foul', 'Metallic'])[1 + mod(g, 3)],
+           random() * 250, random() * 700, random() * 5, random() / 5,
+           random() * 500,
+           (ARRAY['River', 'Lake', 'Groundwater', 'Well'])[1 + mod(g, 4)],
+           random() * 35, random() * 90, 1 + mod(g, 12), 1 + mod(g, 28),
+           (ARRAY['Morning', 'Afternoon', 'Evening', 'Night'])[1 + mod(g, 4)],
+           mod(g, 2),
+           now()::timestamp - make_interval(months => %(months)s)
+               + (g::float / %(rows)s) * make_interval(months => %(months)s)
+    FROM generate_series(1, %(rows)s) AS g
+"""
+
+
+def connect():
+    return psycopg2.connect(
+        host=DatabaseConfig.HOST,
+        port=DatabaseConfig.PORT,
+        user=DatabaseConfig.USER,
+        password=DatabaseConfig.PASSWORD,
+        dbname=DatabaseConfig.DBNAME,
+    )
+
+
+def create_heap(cur):
+    # The layout before partitioning: primary key only
+    cur.execute(f"CREATE UNLOGGED TABLE {HEAP_TABLE} ({COLUMNS_DDL}, PRIMARY KEY (id))")
+
+
+def create_partitioned(cur, months):
+    # Partitioned parents cannot be unlogged; the partitions are
+    cur.execute(
+        f"CREATE TABLE {PARTITIONED_TABLE} ({COLUMNS_DDL}, PRIMARY KEY (id, timestamp)) "
+        "PARTITION BY RANGE (timestamp)"
+    )
+    cur.execute(f"CREATE UNLOGGED TABLE {PARTITIONED_TABLE}_default PARTITION OF {PARTITIONED_TABLE} DEFAULT")
+    cur.execute(
+        "SELECT generate_series(date_trunc('month', now()) - make_interval(months => %s), "
+        "date_trunc('month', now()), interval '1 month')::date",
+        (months,),
+    )
+    for (month_start,) in cur.fetchall():
+        cur.execute(
+            f"CREATE UNLOGGED TABLE {PARTITIONED_TABLE}_{month_start:%Y_%m} "
+            f"PARTITION OF {PARTITIONED_TABLE} "
+            "FOR VALUES FROM (%s) TO (%s::date + interval '1 month')",
+            (month_start, month_start),
+        )
+
+
+def index_partitioned(cur):
+    # Same indexes as setup.sql, built after the load
+    cur.execute(
+        f"CREATE INDEX ON {PARTITIONED_TABLE} (timestamp DESC, id DESC)"
+    )
+    cur.execute(
+        f"CREATE INDEX ON {PARTITIONED_TABLE} USING BRIN (timestamp) WITH (pages_per_range = 32)"
+    )
+
+
+def drop_tables(cur):
+    cur.execute(f"DROP TABLE IF EXISTS {HEAP_TABLE}")
+    cur.execute(f"DROP TABLE IF EXISTS {PARTITIONED_TABLE}")
+
+
+def explain_ms(cur, query, params):
+    cur.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + query, params)
+    plan = cur.fetchone()[0][0]
+    return plan["Execution Time"]
+
+
+def scenarios(month_start, month_end):
+    """(name, build_query kwargs) for the queries the API issues"""
+    return [
+        ("latest_1000", {"limit": 1000}),
+        ("one_month", {"start_date": month_start, "end_date": month_end}),
+        ("one_month_first_page", {"start_date": month_start, "end_date": month_end, "limit": 1000}),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prediction query plans on heap vs partitions")
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query; the best is reported")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark tables")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    # Last full calendar month (end_date is inclusive)
+    month_end = date.today().replace(day=1) - timedelta(days=1)
+    month_start = month_end.replace(day=1)
+    fill_params = {"rows": args.rows, "months": args.months}
+
+    results = []
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            drop_tables(cur)
+            create_heap(cur)
+            create_partitioned(cur, args.months)
+            print(f"Loading {args.rows:,} rows into each table ...")
+            for table in (HEAP_TABLE, PARTITIONED_TABLE):
+                cur.execute(FILL_QUERY.format(table=table), fill_params)
+            index_partitioned(cur)
+            cur.execute(f"ANALYZE {HEAP_TABLE}")
+            cur.execute(f"ANALYZE {PARTITIONED_TABLE}")
+        conn.commit()
+
+        with conn.cursor() as cur:
+            for name, kwargs in scenarios(month_start, month_end):
+                for table in (HEAP_TABLE, PARTITIONED_TABLE):
+                    query, params = build_query(table=table, **kwargs)
+                    best = min(explain_ms(cur, query, params) for _ in range(args.repeat))
+                    results.append({"query": name, "table": table, "rows": args.rows, "ms": best})
+                    print(f"{name:>22} {table:>30} {best:10.2f} ms")
+            conn.rollback()
+
+            if not args.keep:
+                drop_tables(cur)
+        conn.commit()
+    finally:
+        conn.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Benchmark: batch scoring throughput from 1 to N cores
+#
+# Compares process-pool sharding (ParallelScorer) with the forest's own
+# n_jobs threads. Without --model, a forest is trained on synthetic rows.
+#
+# Usage (from the repository root):
+#   python benchmarks/bench_scoring.py --rows 1000000 --max-workers 8
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "streamlit"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import joblib  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+
+from preprocessing import encode_frame  # noqa: E402
+from scoring import ParallelScorer  # noqa: E402
+from synthetic import synthetic_frame  # noqa: E402
+
+
+def train_model(path, rows=50_000):
+    frame = synthetic_frame(rows, seed=7)
+    model = RandomForestClassifier(n_estimators=100, n_jobs=-1, random_state=21)
+    model.fit(encode_frame(frame), frame["prediction"])
+    joblib.dump(model, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure batch scoring scaling across cores")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--model", help="model to score with (default: train one)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        model_path = args.model
+        if model_path is None:
+            model_path = os.path.join(scratch, "bench_model.pkl")
+            train_model(model_path)
+
+        features = encode_frame(synthetic_frame(args.rows))
+        workers = sorted({1, *range(2, args.max_workers + 1, 2), args.max_workers})
+
+        results = []
+        for count in workers:
+            for strategy, scorer_args in (
+                ("processes", {"workers": count, "n_jobs": 1}),
+                ("threads", {"workers": 1, "n_jobs": count}),
+            ):
+                if count == 1 and strategy == "threads":
+                    continue
+                with ParallelScorer(model_path, **scorer_args) as scorer:
+                    # Warm-up so pool start and model loads are not timed
+                    scorer.predict(features[: scorer.min_shard_rows * count])
+                    started = time.perf_counter()
+                    scorer.predict(features)
+                    elapsed = time.perf_counter() - started
+                results.append(
+                    {
+                        "strategy": strategy,
+                        "cores": count,
+                        "rows": args.rows,
+                        "seconds": elapsed,
+                        "rows_per_sec": args.rows / elapsed,
+                    }
+                )
+                print(f"{strategy:>10} {count:>3} cores  {elapsed:8.3f}s  {args.rows / elapsed:12,.0f} rows/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Compare two bench_api.py result files, e.g. a branch against main
+#
+# Usage (from the repository root):
+#   python benchmarks/compare.py baseline.json candidate.json --threshold 0.1
+# Exits with status 1 when any scenario regresses by more than the threshold.
+import argparse
+import json
+import sys
+
+KEY = ("scenario", "concurrency")
+
+
+def load(path):
+    with open(path) as f:
+        run = json.load(f)
+    return run, {tuple(result[k] for k in KEY): result for result in run["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two API benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative throughput drop or p95 increase counted as a regression")
+    args = parser.parse_args()
+
+    baseline_run, baseline = load(args.baseline)
+    candidate_run, candidate = load(args.candidate)
+    print(f"baseline {baseline_run.get('commit')}  candidate {candidate_run.get('commit')}")
+
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        throughput = after["requests_per_sec"] / before["requests_per_sec"] - 1
+        p95 = after["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        regressed = throughput < -args.threshold or p95 > args.threshold
+        regressions += regressed
+        print(
+            f"{key[0]:>14} c={key[1]:<4} req/s {throughput:+7.1%}  p95 {p95:+7.1%}"
+            + ("  REGRESSION" if regressed else "")
+        )
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Synthetic water-quality rows matching the `Prediction` schema and setup.sql
+import numpy as np
+import pandas as pd
+
+SOURCES = ["River", "Lake", "Groundwater", "Well"]
+COLORS = ["Clear", "Brown", "Yellow", "Green"]
+ODORS = ["Odorless", "Foul", "Metallic"]
+TIMES_OF_DAY = ["Morning", "Afternoon", "Evening", "Night"]
+
+
+def synthetic_frame(n, seed=21):
+    """
+    Generate `n` rows with the API field names (ph, iron, ..., prediction)
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "ph": rng.normal(7.2, 0.8, n).clip(0, 14),
+            "iron": rng.exponential(0.3, n),
+            "nitrate": rng.exponential(6.0, n),
+            "chloride": rng.normal(180, 60, n).clip(0),
+            "lead": rng.exponential(0.002, n),
+            "zinc": rng.exponential(1.5, n),
+            "color": rng.choice(COLORS, n),
+            "turbidity": rng.exponential(0.5, n),
+            "fluoride": rng.exponential(0.9, n),
+            "copper": rng.exponential(0.5, n),
+            "odor": rng.choice(ODORS, n),
+            "sulfate": rng.normal(140, 50, n).clip(0),
+            "conductivity": rng.normal(420, 150, n).clip(0),
+            "chlorine": rng.normal(3.2, 0.6, n).clip(0),
+            "manganese": rng.exponential(0.1, n),
+            "tds": rng.normal(270, 120, n).clip(0),
+            "source": rng.choice(SOURCES, n),
+            "water_temp": rng.normal(19, 8, n),
+            "air_temp": rng.normal(60, 20, n),
+            "month": rng.integers(1, 13, n),
+            "day": rng.integers(1, 32, n),
+            "time_of_day": rng.choice(TIMES_OF_DAY, n),
+            "prediction": rng.integers(0, 2, n),
+        }
+    )
+
+
+def synthetic_rows(n, seed=21):
+    """Rows as plain tuples in `bulk_ingest.PREDICTION_COLUMNS` order"""
+    frame = synthetic_frame(n, seed)
+    return list(frame.astype(object).itertuples(index=False, name=None))
+
+
+def synthetic_payload(n, seed=21):
+    """Rows as the JSON objects accepted by /save_predictions/"""
+    return synthetic_frame(n, seed).to_dict("records")
@@ -0,0 +1,101 @@
+# Importing required libraries
+import csv
+import io
+import time
+import logging
+from itertools import islice
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+
+# Column order of a prediction row; `timestamp` is filled by the column default
+PREDICTION_COLUMNS = (
+    "ph", "iron", "nitrate", "chloride", "lead", "zinc", "color", "turbidity",
+    "fluoride", "copper", "odor", "sulfate", "conductivity", "chlorine",
+    "manganese", "tds", "source", "water_temp", "air_temp", "month", "day",
+    "time_of_day", "prediction",
+)
+
+# Rows that failed validation, with the names of the rules they broke
+QUARANTINE_TABLE = "predictions_quarantine"
+QUARANTINE_COLUMNS = PREDICTION_COLUMNS + ("violations",)
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def _chunks(rows, size):
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _copy_chunk(cur, table, columns, chunk):
+    # Serialize the chunk as CSV in memory and stream it with COPY FROM STDIN
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(chunk)
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+    )
+
+
+def _values_chunk(cur, table, columns, chunk, page_size):
+    # Multi-row INSERT ... VALUES (...), (...), one statement per page
+    execute_values(
+        cur,
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s",
+        chunk,
+        page_size=page_size,
+    )
+
+
+def bulk_insert(
+    conn,
+    rows,
+    table="predictions",
+    columns=PREDICTION_COLUMNS,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    method="copy",
+    page_size=1000,
+):
+    """
+    Insert rows (tuples in `columns` order) in chunks
+
+    - `method="copy"` streams each chunk with COPY FROM STDIN (CSV) and falls
+      back to `execute_values` if the server refuses COPY
+    - `method="values"` always uses multi-row `execute_values`
+    - Does not commit; the caller owns the transaction
+    - Returns the total row count and per-chunk timings
+    """
+    stats = {"rows": 0, "method": method, "chunks": []}
+
+    with conn.cursor() as cur:
+        for chunk in _chunks(rows, chunk_size):
+            started = time.perf_counter()
+
+            if stats["method"] == "copy":
+                cur.execute("SAVEPOINT bulk_copy")
+                try:
+                    _copy_chunk(cur, table, columns, chunk)
+                    cur.execute("RELEASE SAVEPOINT bulk_copy")
+                except (psycopg2.NotSupportedError, psycopg2.ProgrammingError) as e:
+                    # E.g. a transaction-pooling proxy or a role without COPY rights
+                    logger.warning("COPY unavailable, falling back to execute_values: %s", e)
+                    cur.execute("ROLLBACK TO SAVEPOINT bulk_copy")
+                    stats["method"] = "values"
+
+            if stats["method"] == "values":
+                _values_chunk(cur, table, columns, chunk, page_size)
+
+            stats["rows"] += len(chunk)
+            stats["chunks"].append(
+                {"rows": len(chunk), "seconds": time.perf_counter() - started}
+            )
+
+    return stats
@@ -0,0 +1,79 @@
+# Importing required libraries
+import logging
+
+from bulk_ingest import PREDICTION_COLUMNS
+from streaming import STREAM_MEDIA_TYPES, arrow_schema, pa
+
+logger = logging.getLogger(__name__)
+
+
+ARROW_MEDIA_TYPE = STREAM_MEDIA_TYPES["arrow"]
+
+
+class ColumnValidationError(Exception):
+    """Raised with FastAPI-style error dicts when a columnar payload is invalid."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} validation error(s)")
+        self.errors = errors
+
+
+def _error(loc, msg, error_type):
+    return {"loc": ["body", *loc], "msg": msg, "type": error_type}
+
+
+def negotiate_format(accept, default="json"):
+    """Pick an export format from an Accept header (first listed type that we serve)"""
+    if not accept:
+        return default
+    media_types = {media_type: fmt for fmt, media_type in STREAM_MEDIA_TYPES.items()}
+    media_types["application/json"] = "json"
+    for part in accept.split(","):
+        fmt = media_types.get(part.split(";")[0].strip())
+        if fmt is not None:
+            return fmt
+    return default
+
+
+def decode_arrow_predictions(body):
+    """
+    Validate an Arrow IPC stream of predictions column by column
+
+    - Every `Prediction` field must be present and free of nulls
+    - Columns are cast to the table types; lossy casts (e.g. 2.5 into an
+      int column, or text into a float column) are errors
+    - Returns the validated pa.Table in PREDICTION_COLUMNS order; raises
+      ColumnValidationError listing every bad column
+    """
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise ColumnValidationError([_error([], f"invalid Arrow IPC stream: {e}", "value_error.arrow")])
+
+    errors = []
+    columns = []
+    schema = arrow_schema(PREDICTION_COLUMNS)
+    for field in schema:
+        if field.name not in table.column_names:
+            errors.append(_error([field.name], "field required", "value_error.missing"))
+            continue
+        column = table.column(field.name)
+        if column.null_count:
+            errors.append(_error(
+                [field.name], f"none is not an allowed value ({column.null_count} row(s))",
+                "type_error.none.not_allowed",
+            ))
+            continue
+        try:
+            columns.append(column.cast(field.type, safe=True))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            errors.append(_error([field.name], f"expected {field.type}: {e}", "type_error"))
+
+    if errors:
+        raise ColumnValidationError(errors)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def table_rows(table):
+    """Row tuples in PREDICTION_COLUMNS order for `bulk_insert`"""
+    return zip(*(table.column(name).to_pylist() for name in PREDICTION_COLUMNS))
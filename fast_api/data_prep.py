@@ -0,0 +1,312 @@
+# Incremental data preparation: raw CSV chunks -> cleaned Parquet partitions
+#
+# Replaces the Data_Process notebook. Every raw chunk in the ingestion folder
+# is cleaned on its own and cached as one Parquet partition named after the
+# chunk's content hash. A run only re-processes chunks that are new or whose
+# bytes changed; everything else is read from the cache. Cleaning never looks
+# at other chunks, so partitions stay valid as history grows. Missing numeric
+# values are imputed when the dataset is read (`read_dataset`), from
+# statistics over every partition.
+#
+# Usage (from the repository root):
+#   python fast_api/data_prep.py --raw-dir data/ingestion/raw_data_chunks --clean-dir data/cleaned
+#   python fast_api/data_prep.py --workers 4 --prune
+#   python fast_api/data_prep.py --categories categories.json   # extra allowed values
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import CATEGORIES, CATEGORY_DEFAULTS, CSV_COLUMNS, FEATURE_ORDER
+
+try:
+    import pyarrow  # noqa: F401  (Parquet engine)
+except ImportError:  # Parquet partitions need pyarrow
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+
+# Data preparation Configuration
+class DataPrepConfig:
+    RAW_DIR = os.environ.get("AQUA_RAW_DIR", os.path.join("data", "ingestion", "raw_data_chunks"))
+    CLEAN_DIR = os.environ.get("AQUA_CLEAN_DIR", os.path.join("data", "cleaned"))
+    # Label column of the raw data
+    TARGET_COLUMN = os.environ.get("AQUA_TARGET_COLUMN", "Target")
+    # JSON {feature: [values]} allowed on top of CATEGORIES (e.g. the real data's sources)
+    CATEGORIES_PATH = os.environ.get("AQUA_CATEGORIES_PATH", "")
+
+
+# Bump when the cleaning rules change: every chunk is then re-processed
+PIPELINE_VERSION = "2"
+
+TARGET = "target"
+DATASET_COLUMNS = FEATURE_ORDER + [TARGET]
+NUMERIC_COLUMNS = [name for name in FEATURE_ORDER if name not in CATEGORIES]
+
+# Leading underscore: Parquet readers skip the manifest when listing partitions
+MANIFEST_NAME = "_manifest.json"
+
+# Raw exports that store a categorical as a number: (bin edges, category per
+# bin). Any other numeric categorical is rejected rather than guessed at.
+NUMERIC_CATEGORY_BINS = {
+    # Hour of day, 0-23
+    "time_of_day": ([5, 12, 17, 21], ["Night", "Morning", "Afternoon", "Evening", "Night"]),
+}
+HOURS = (0, 24)
+
+MONTHS = {
+    name: number for number, name in enumerate(
+        ["january", "february", "march", "april", "may", "june", "july",
+         "august", "september", "october", "november", "december"], start=1,
+    )
+}
+
+
+def chunk_hash(path):
+    """Content hash of a raw chunk (plus the pipeline version), read in 1 MB blocks"""
+    digest = hashlib.blake2b(PIPELINE_VERSION.encode(), digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_categories(path=DataPrepConfig.CATEGORIES_PATH):
+    """CATEGORIES plus the extra values listed in the JSON file at `path` (if any)"""
+    categories = {name: list(values) for name, values in CATEGORIES.items()}
+    if path:
+        with open(path) as f:
+            extra = json.load(f)
+        unknown = sorted(set(extra) - set(categories))
+        if unknown:
+            raise ValueError(f"Not categorical feature(s) in {path}: {unknown}")
+        for name, values in extra.items():
+            categories[name] = sorted(set(categories[name]) | {str(value) for value in values})
+    return categories
+
+
+def clean_category(column, name, allowed):
+    """
+    One categorical column as text, every value checked against `allowed`
+
+    - Numeric columns are mapped through NUMERIC_CATEGORY_BINS, or rejected
+    - Missing values get the CATEGORY_DEFAULTS value
+    - Raises ValueError naming the values outside `allowed`, instead of
+      letting each one become a new category at training time
+    """
+    if pd.api.types.is_numeric_dtype(column):
+        if name not in NUMERIC_CATEGORY_BINS:
+            raise ValueError(f"{name} is numeric in the raw data; expected one of {allowed}")
+        edges, labels = NUMERIC_CATEGORY_BINS[name]
+        values = column.to_numpy(dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            out_of_range = (values < HOURS[0]) | (values >= HOURS[1])
+        if out_of_range.any():
+            raise ValueError(f"{name} hours outside {HOURS}: {sorted(set(values[out_of_range]))[:10]}")
+        mapped = np.asarray(labels, dtype=object)[np.searchsorted(edges, values, side="right")]
+        column = pd.Series(np.where(np.isnan(values), None, mapped), index=column.index)
+    column = column.fillna(CATEGORY_DEFAULTS[name]).astype(str).str.strip()
+    unknown = ~column.isin(allowed)
+    if unknown.any():
+        bad = sorted(column[unknown].unique())
+        raise ValueError(f"Unknown {name} value(s) ({len(bad)}): {bad[:10]}")
+    return column
+
+
+def clean_chunk(raw, target_column=DataPrepConfig.TARGET_COLUMN, categories=None):
+    """
+    Clean one raw chunk with whole-column operations
+
+    - CSV headers become API field names; only features and the target are kept
+    - Numbers are coerced to float (unparseable values become NaN)
+    - Month names become month numbers, matching what the apps send
+    - Categoricals are checked against `categories` (default CATEGORIES) by
+      `clean_category`; a chunk with unknown values fails as a whole
+    - Rows without a target and exact duplicates are dropped
+    - Missing numerics stay NaN; `read_dataset` imputes them
+    """
+    categories = categories or CATEGORIES
+    frame = raw.rename(columns={**CSV_COLUMNS, target_column: TARGET})
+    missing = [name for name in DATASET_COLUMNS if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {missing}")
+    frame = frame[DATASET_COLUMNS].copy()
+
+    month = frame["month"]
+    if not pd.api.types.is_numeric_dtype(month):
+        frame["month"] = month.astype(str).str.strip().str.lower().map(MONTHS).fillna(
+            pd.to_numeric(month, errors="coerce")
+        )
+    for name in NUMERIC_COLUMNS:
+        frame[name] = pd.to_numeric(frame[name], errors="coerce").astype(np.float64)
+    for name in CATEGORY_DEFAULTS:
+        frame[name] = clean_category(frame[name], name, categories[name])
+
+    frame = frame[frame[TARGET].notna()]
+    frame[TARGET] = frame[TARGET].astype(np.int64)
+    return frame.drop_duplicates(ignore_index=True)
+
+
+def _process(task):
+    # One chunk: read, clean, write the partition atomically; (rows, error)
+    path, partition_path, target_column, categories = task
+    try:
+        frame = clean_chunk(pd.read_csv(path), target_column, categories)
+        directory, name = os.path.split(partition_path)
+        temporary = os.path.join(directory, f".{name}.tmp")
+        frame.to_parquet(temporary, index=False)
+        os.replace(temporary, partition_path)
+    except (ValueError, pd.errors.ParserError, OSError) as e:
+        return None, str(e)
+    return len(frame), None
+
+
+def load_manifest(clean_dir):
+    try:
+        with open(os.path.join(clean_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(clean_dir, manifest):
+    temporary = os.path.join(clean_dir, f".{MANIFEST_NAME}.tmp")
+    with open(temporary, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temporary, os.path.join(clean_dir, MANIFEST_NAME))
+
+
+def prepare(raw_dir=DataPrepConfig.RAW_DIR, clean_dir=DataPrepConfig.CLEAN_DIR,
+            target_column=DataPrepConfig.TARGET_COLUMN, workers=1, prune=False, categories=None):
+    """
+    Bring the cleaned dataset up to date with the raw chunks
+
+    - The manifest maps each raw chunk to its content hash and partition
+    - New or changed chunks are cleaned (in `workers` processes); the old
+      partition of a changed chunk is removed once the new one is written
+    - With `prune`, partitions of chunks no longer in `raw_dir` are removed
+    - Chunks that fail to parse or hold categorical values outside
+      `categories` (default CATEGORIES) are logged and left for the next run
+    - Returns a summary of the run
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet partitions require pyarrow")
+    categories = categories or CATEGORIES
+    os.makedirs(clean_dir, exist_ok=True)
+    manifest = load_manifest(clean_dir)
+    started = time.perf_counter()
+
+    sources = sorted(name for name in os.listdir(raw_dir) if name.endswith(".csv"))
+    todo = []
+    for name in sources:
+        digest = chunk_hash(os.path.join(raw_dir, name))
+        entry = manifest.get(name)
+        if entry and entry["hash"] == digest and os.path.exists(os.path.join(clean_dir, entry["partition"])):
+            continue
+        partition = f"{os.path.splitext(name)[0]}-{digest[:16]}.parquet"
+        todo.append((name, digest, partition))
+
+    summary = {"chunks": len(sources), "processed": 0, "skipped": len(sources) - len(todo),
+               "failed": 0, "removed": 0, "rows": 0}
+    tasks = [
+        (os.path.join(raw_dir, name), os.path.join(clean_dir, partition), target_column, categories)
+        for name, _, partition in todo
+    ]
+    pool = ProcessPoolExecutor(workers) if workers > 1 and len(tasks) > 1 else None
+    try:
+        results = pool.map(_process, tasks) if pool else map(_process, tasks)
+        for (name, digest, partition), (rows, error) in zip(todo, results):
+            if error is not None:
+                logger.error("Skipping raw chunk %s: %s", name, error)
+                summary["failed"] += 1
+                continue
+            previous = manifest.get(name)
+            if previous and previous["partition"] != partition:
+                _remove(os.path.join(clean_dir, previous["partition"]))
+            manifest[name] = {"hash": digest, "partition": partition, "rows": rows,
+                              "processed_at": datetime.now().isoformat()}
+            summary["processed"] += 1
+            summary["rows"] += rows
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if prune:
+        for name in set(manifest) - set(sources):
+            _remove(os.path.join(clean_dir, manifest.pop(name)["partition"]))
+            summary["removed"] += 1
+
+    save_manifest(clean_dir, manifest)
+    summary["seconds"] = time.perf_counter() - started
+    logger.info("Data prep: %s", summary)
+    return summary
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def impute_numeric(frame):
+    """
+    Fill missing numerics in place: mean for near-symmetric columns
+    (|skew| < 0.5), median otherwise, as the original notebook intended
+    """
+    numeric = [name for name in NUMERIC_COLUMNS if name in frame.columns]
+    stats = frame[numeric]
+    fill = stats.mean().where(stats.skew().abs() < 0.5, stats.median())
+    frame.fillna(fill.to_dict(), inplace=True)
+    return frame
+
+
+def read_dataset(clean_dir=DataPrepConfig.CLEAN_DIR, columns=DATASET_COLUMNS):
+    """
+    Read the cleaned partitions, loading only `columns`, with numerics imputed
+
+    Parquet is columnar, so unused columns are never read from disk.
+    """
+    frame = pd.read_parquet(clean_dir, columns=list(columns))
+    return impute_numeric(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean new raw CSV chunks into Parquet partitions")
+    parser.add_argument("--raw-dir", default=DataPrepConfig.RAW_DIR)
+    parser.add_argument("--clean-dir", default=DataPrepConfig.CLEAN_DIR)
+    parser.add_argument("--target-column", default=DataPrepConfig.TARGET_COLUMN)
+    parser.add_argument("--workers", type=int, default=1, help="processes cleaning chunks in parallel")
+    parser.add_argument("--prune", action="store_true", help="drop partitions whose raw chunk is gone")
+    parser.add_argument("--categories", default=DataPrepConfig.CATEGORIES_PATH,
+                        help="JSON {feature: [values]} allowed on top of the built-in categories")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        summary = prepare(args.raw_dir, args.clean_dir, args.target_column, args.workers, args.prune,
+                          load_categories(args.categories))
+    except (RuntimeError, ValueError, OSError) as e:
+        logger.error("%s", e)
+        sys.exit(1)
+    print(
+        f"{summary['processed']} chunk(s) processed ({summary['rows']:,} rows), "
+        f"{summary['skipped']} unchanged, {summary['failed']} failed, "
+        f"{summary['removed']} removed in {summary['seconds']:.1f}s"
+    )
+    # Failed chunks are logged above; a non-zero exit stops scripted pipelines
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
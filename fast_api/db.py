@@ -0,0 +1,257 @@
+# Importing required libraries
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from fastapi import HTTPException
+
+from metrics import stage
+
+logger = logging.getLogger(__name__)
+
+
+# Database Configuration
+class DatabaseConfig:
+    DBNAME = os.environ.get("AQUA_DB_NAME", "aqua")
+    USER = os.environ.get("AQUA_DB_USER", "postgres")
+    PASSWORD = os.environ.get("AQUA_DB_PASSWORD", "Charanrocks@2597")
+    HOST = os.environ.get("AQUA_DB_HOST", "localhost")
+    PORT = os.environ.get("AQUA_DB_PORT", "5432")
+    CONNECT_TIMEOUT = int(os.environ.get("AQUA_DB_CONNECT_TIMEOUT", "3"))
+
+    # Pool sizing and lifecycle
+    POOL_MIN_SIZE = int(os.environ.get("AQUA_DB_POOL_MIN", "2"))
+    POOL_MAX_SIZE = int(os.environ.get("AQUA_DB_POOL_MAX", "20"))
+    # Seconds to wait for a free connection before giving up with a 503
+    POOL_TIMEOUT = float(os.environ.get("AQUA_DB_POOL_TIMEOUT", "5"))
+    # Connections idle for longer than this are closed instead of reused
+    POOL_MAX_IDLE = float(os.environ.get("AQUA_DB_POOL_MAX_IDLE", "300"))
+    # Connections older than this are recycled on return
+    POOL_MAX_LIFETIME = float(os.environ.get("AQUA_DB_POOL_MAX_LIFETIME", "3600"))
+    # Idle connections older than this get a "SELECT 1" before being handed out
+    POOL_HEALTH_CHECK_AFTER = float(os.environ.get("AQUA_DB_POOL_CHECK_AFTER", "30"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout."""
+
+
+class DatabasePool:
+    """
+    Bounded psycopg2 connection pool
+
+    - Keeps between `min_size` and `max_size` open connections
+    - Blocks (up to `timeout` seconds) when every connection is checked out
+    - Health-checks connections that sat idle, and recycles idle/old ones
+    - Tracks wait time and saturation for the metrics endpoint
+    """
+
+    def __init__(self, config=DatabaseConfig):
+        self.config = config
+        self.min_size = config.POOL_MIN_SIZE
+        self.max_size = max(config.POOL_MAX_SIZE, self.min_size, 1)
+        self.timeout = config.POOL_TIMEOUT
+
+        self._pool = None
+        self._lock = threading.Lock()
+        # Counts free slots so callers queue instead of hitting PoolError
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._created_at = {}
+        self._last_used = {}
+
+        # Metrics
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquired_total = 0
+        self.timeouts_total = 0
+        self.recycled_total = 0
+        self.failed_health_checks = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    # Opening and closing the pool
+    def open(self):
+        self._pool = pg_pool.ThreadedConnectionPool(
+            self.min_size,
+            self.max_size,
+            host=self.config.HOST,
+            port=self.config.PORT,
+            user=self.config.USER,
+            password=self.config.PASSWORD,
+            dbname=self.config.DBNAME,
+            connect_timeout=self.config.CONNECT_TIMEOUT,
+        )
+        logger.info(
+            "Database pool opened (min=%d, max=%d)", self.min_size, self.max_size
+        )
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+            logger.info("Database pool closed")
+
+    @property
+    def is_open(self):
+        return self._pool is not None and not self._pool.closed
+
+    # Checking connections in and out
+    def getconn(self):
+        if not self.is_open:
+            # The database may have been down at startup; retry lazily
+            with self._lock:
+                if not self.is_open:
+                    self.open()
+
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            self.timeouts_total += 1
+            raise PoolTimeout(
+                f"No database connection available after {self.timeout:.1f}s"
+            )
+
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.perf_counter() - started
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.acquired_total += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return conn
+
+    def putconn(self, conn):
+        try:
+            now = time.monotonic()
+            expired = (
+                now - self._created_at.get(id(conn), now)
+                > self.config.POOL_MAX_LIFETIME
+            )
+            broken = conn.closed or (
+                conn.get_transaction_status()
+                not in (psycopg2.extensions.TRANSACTION_STATUS_IDLE,)
+            )
+            if broken and not conn.closed:
+                # Never hand a half-finished transaction to the next request
+                try:
+                    conn.rollback()
+                    broken = False
+                except psycopg2.Error:
+                    broken = True
+            if expired or broken:
+                self._discard(conn)
+            else:
+                self._last_used[id(conn)] = now
+                self._pool.putconn(conn)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def _checkout(self):
+        # Loop until we get a live connection; dead ones are dropped
+        while True:
+            conn = self._pool.getconn()
+            key = id(conn)
+            now = time.monotonic()
+            self._created_at.setdefault(key, now)
+            idle_for = now - self._last_used.get(key, now)
+
+            if idle_for > self.config.POOL_MAX_IDLE:
+                self._discard(conn)
+                continue
+            if idle_for > self.config.POOL_HEALTH_CHECK_AFTER and not self._is_healthy(conn):
+                self.failed_health_checks += 1
+                self._discard(conn)
+                continue
+            return conn
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        key = id(conn)
+        self._created_at.pop(key, None)
+        self._last_used.pop(key, None)
+        self.recycled_total += 1
+        self._pool.putconn(conn, close=True)
+
+    # Metrics snapshot
+    def stats(self):
+        with self._lock:
+            acquired = self.acquired_total
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "saturation": self.in_use / self.max_size,
+                "acquired_total": acquired,
+                "timeouts_total": self.timeouts_total,
+                "recycled_total": self.recycled_total,
+                "failed_health_checks": self.failed_health_checks,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_avg": self.wait_seconds_total / acquired if acquired else 0.0,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+# Shared pool, opened and closed by the app lifespan
+db_pool = DatabasePool()
+
+
+def acquire_connection():
+    """
+    Borrow a pooled connection, turning pool/database failures into a 503
+
+    The caller must hand it back with `db_pool.putconn`.
+    """
+    try:
+        with stage("db_connect"):
+            return db_pool.getconn()
+    except PoolTimeout as e:
+        logger.error("Connection pool exhausted: %s", e)
+        raise HTTPException(status_code=503, detail=f"Database busy: {e}")
+    except psycopg2.OperationalError as e:
+        logger.error("Connection failed: %s", e)
+        raise HTTPException(status_code=503, detail=f"Database connection failed: {e}")
+
+
+# Database Connection Dependency
+def get_db_connection():
+    """
+    Borrow a pooled connection for the duration of a request
+
+    The connection is always handed back to the pool, even when the
+    endpoint raises.
+    """
+    conn = acquire_connection()
+    try:
+        yield conn
+    finally:
+        db_pool.putconn(conn)
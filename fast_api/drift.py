@@ -0,0 +1,301 @@
+# Importing required libraries
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from validation import as_float
+
+logger = logging.getLogger(__name__)
+
+
+# Drift monitoring Configuration
+class DriftConfig:
+    # Incoming rows are scored against the baseline over this sliding window
+    WINDOW_HOURS = int(os.environ.get("AQUA_DRIFT_WINDOW_HOURS", "24"))
+    # Quantile bins per numeric feature, fixed from the training data
+    BINS = int(os.environ.get("AQUA_DRIFT_BINS", "10"))
+    # PSI thresholds: below WARN is stable, above ALERT is drift
+    PSI_WARN = float(os.environ.get("AQUA_DRIFT_PSI_WARN", "0.1"))
+    PSI_ALERT = float(os.environ.get("AQUA_DRIFT_PSI_ALERT", "0.25"))
+    # Fewer rows in the window than this are reported as insufficient data
+    MIN_ROWS = int(os.environ.get("AQUA_DRIFT_MIN_ROWS", "500"))
+
+
+# Floor for empty bins so PSI stays finite
+EPSILON = 1e-4
+
+# Key of the prediction distribution in a baseline and a report
+PREDICTION = "prediction"
+
+
+def baseline_path(model_path):
+    """Baseline artifact next to a model: water_quality_model.pkl -> water_quality_model.baseline.json"""
+    return os.path.splitext(model_path)[0] + ".baseline.json"
+
+
+def _proportions(counts):
+    total = counts.sum()
+    return counts / total if total else np.zeros(len(counts))
+
+
+def build_baseline(columns, categories, predictions, classes, bins=DriftConfig.BINS):
+    """
+    Training-time distributions the serving traffic is compared against
+
+    - `columns` maps feature name -> training values; categoricals may be
+      text or codes into `categories[name]`
+    - Numeric features get `bins` quantile bins (open-ended first and last);
+      the baseline stores the interior edges and the share of rows per bin
+    - Categoricals store the share of rows per category, plus a last slot for
+      values outside the training categories (0 at training time)
+    - `predictions` (on held-out rows) give the expected class distribution
+    """
+    baseline = {"created_at": datetime.now().isoformat(), "bins": bins,
+                "numeric": {}, "categorical": {}}
+    for name, values in columns.items():
+        if name in categories:
+            index = pd.Index(categories[name])
+            counts = _category_counts(index, values)
+            baseline["categorical"][name] = {
+                "categories": list(categories[name]),
+                "proportions": _proportions(counts).tolist(),
+            }
+            continue
+        values = as_float(values)
+        values = values[np.isfinite(values)]
+        quantiles = np.linspace(0, 1, bins + 1)[1:-1]
+        # Repeated quantiles (e.g. a mostly-zero column) collapse into one edge
+        edges = np.unique(np.quantile(values, quantiles)) if len(values) else np.empty(0)
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        baseline["numeric"][name] = {
+            "edges": edges.tolist(),
+            "proportions": _proportions(counts).tolist(),
+        }
+    baseline["rows"] = len(next(iter(columns.values()))) if columns else 0
+
+    index = pd.Index(classes)
+    counts = _category_counts(index, predictions)
+    baseline[PREDICTION] = {
+        "classes": [c.item() if hasattr(c, "item") else c for c in classes],
+        "proportions": _proportions(counts).tolist(),
+    }
+    return baseline
+
+
+def save_baseline(path, baseline):
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+    logger.info("Saved drift baseline to %s", path)
+
+
+def load_baseline(model_path):
+    """The baseline saved with the model at `model_path`, or None for older models"""
+    path = baseline_path(model_path)
+    if not os.path.exists(path):
+        logger.warning("No drift baseline at %s; drift monitoring is off", path)
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _category_counts(index, values):
+    # Codes into `index` (numeric values are taken as codes already); the last slot counts the rest
+    values = np.asarray(values)
+    n = len(index)
+    if values.dtype.kind in "fiub" and index.dtype == object:
+        codes = values.astype(np.int64)
+        codes[(codes < 0) | (codes >= n)] = n
+    else:
+        codes = index.get_indexer(values.astype(object) if values.dtype.kind in "OUS" else values)
+        codes[codes == -1] = n
+    return np.bincount(codes, minlength=n + 1)
+
+
+def psi(expected, actual):
+    """Population stability index of two distributions over the same bins"""
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), EPSILON)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks(expected, actual):
+    """Kolmogorov-Smirnov distance between two binned distributions (largest CDF gap at a bin edge)"""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual)))) if len(expected) else 0.0
+
+
+class DriftMonitor:
+    """
+    Incremental feature and prediction drift against a training baseline
+
+    - `observe` adds a batch to the current hour's counts: one binning pass
+      per column, so the cost is O(batch) and the table is never rescanned
+    - Counts are kept per hour for the last `window_hours`; a report sums the
+      hourly counts (O(hours x bins)) and scores them with PSI, plus the KS
+      distance for numeric features
+    - Without a baseline every call is a no-op
+    """
+
+    def __init__(self, baseline=None, window_hours=DriftConfig.WINDOW_HOURS):
+        self.window_hours = window_hours
+        self._lock = threading.Lock()
+        self.set_baseline(baseline)
+
+    def load(self, model_path):
+        self.set_baseline(load_baseline(model_path))
+
+    def set_baseline(self, baseline):
+        with self._lock:
+            self.baseline = baseline
+            # Hourly buckets: [hour, rows, {column: counts}], oldest first
+            self._buckets = deque()
+            self.rows_observed = 0
+            self.seconds = 0.0
+            self._columns = {}
+            if baseline is None:
+                return
+            for name, spec in baseline["numeric"].items():
+                self._columns[name] = ("numeric", np.asarray(spec["edges"], dtype=np.float64))
+            for name, spec in baseline["categorical"].items():
+                self._columns[name] = ("categorical", pd.Index(spec["categories"]))
+            self._columns[PREDICTION] = ("categorical", pd.Index(baseline[PREDICTION]["classes"]))
+
+    @property
+    def enabled(self):
+        return self.baseline is not None
+
+    def observe(self, columns, mask=None):
+        """
+        Count one batch; `columns` maps name -> array-like (missing columns are
+        skipped), `mask` keeps only the rows that passed validation
+        """
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        counts = {}
+        n_rows = 0
+        for name, (kind, reference) in self._columns.items():
+            if name not in columns:
+                continue
+            values = np.asarray(columns[name])
+            if mask is not None:
+                values = values[mask]
+            n_rows = len(values)
+            if kind == "numeric":
+                values = as_float(values)
+                bins = np.searchsorted(reference, values, side="right")
+                # Last slot: missing values, which are left out of the scores
+                bins[np.isnan(values)] = len(reference) + 1
+                counts[name] = np.bincount(bins, minlength=len(reference) + 2)
+            else:
+                counts[name] = _category_counts(reference, values)
+        if not n_rows:
+            return
+
+        hour = int(time.time() // 3600)
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != hour:
+                self._buckets.append([hour, 0, {}])
+            bucket = self._buckets[-1]
+            bucket[1] += n_rows
+            for name, column_counts in counts.items():
+                if name in bucket[2]:
+                    bucket[2][name] += column_counts
+                else:
+                    bucket[2][name] = column_counts
+            self._expire(hour)
+            self.rows_observed += n_rows
+            self.seconds += time.perf_counter() - started
+
+    def _expire(self, hour):
+        while self._buckets and self._buckets[0][0] <= hour - self.window_hours:
+            self._buckets.popleft()
+
+    def _window(self):
+        # Summed counts of the buckets still in the window
+        with self._lock:
+            self._expire(int(time.time() // 3600))
+            rows = sum(bucket[1] for bucket in self._buckets)
+            totals = {}
+            for _, _, counts in self._buckets:
+                for name, column_counts in counts.items():
+                    totals[name] = totals.get(name, 0) + column_counts
+        return rows, totals
+
+    def _status(self, score, rows):
+        if rows < DriftConfig.MIN_ROWS:
+            return "insufficient_data"
+        if score >= DriftConfig.PSI_ALERT:
+            return "drift"
+        if score >= DriftConfig.PSI_WARN:
+            return "warning"
+        return "stable"
+
+    def report(self):
+        """Drift scores per feature and for the predictions over the current window"""
+        if not self.enabled:
+            return {"enabled": False}
+        rows, totals = self._window()
+        report = {
+            "enabled": True,
+            "baseline": {"created_at": self.baseline["created_at"], "rows": self.baseline["rows"]},
+            "window_hours": self.window_hours,
+            "rows": rows,
+            "features": {},
+        }
+        for name, (kind, reference) in self._columns.items():
+            counts = totals.get(name)
+            if counts is None:
+                continue
+            if kind == "numeric":
+                expected = np.asarray(self.baseline["numeric"][name]["proportions"])
+                observed = counts[:-1]
+                actual = _proportions(observed)
+                entry = {"psi": psi(expected, actual), "ks": ks(expected, actual),
+                         "missing": int(counts[-1])}
+            else:
+                spec = self.baseline[PREDICTION] if name == PREDICTION else self.baseline["categorical"][name]
+                # Both end with the slot for values unseen in training
+                expected = np.asarray(spec["proportions"])
+                observed = counts
+                actual = _proportions(observed)
+                entry = {"psi": psi(expected, actual), "unseen": int(counts[-1])}
+                if name == PREDICTION:
+                    labels = [str(label) for label in spec["classes"]]
+                    entry["distribution"] = dict(zip(labels, actual[:-1].tolist()))
+                    entry["baseline"] = dict(zip(labels, spec["proportions"]))
+            entry["status"] = self._status(entry["psi"], int(observed.sum()))
+            if name == PREDICTION:
+                report[PREDICTION] = entry
+            else:
+                report["features"][name] = entry
+
+        scores = [entry["psi"] for entry in report["features"].values()]
+        report["max_psi"] = max(scores, default=0.0)
+        report["status"] = self._status(
+            max(report["max_psi"], report.get(PREDICTION, {}).get("psi", 0.0)), rows
+        )
+        return report
+
+    def stats(self):
+        report = self.report()
+        if not report["enabled"]:
+            return {"enabled": False, "psi": {}}
+        features = report["features"]
+        return {
+            "enabled": True,
+            "rows_observed": self.rows_observed,
+            "seconds": self.seconds,
+            "window_rows": report["rows"],
+            "max_psi": report["max_psi"],
+            "prediction_psi": report.get(PREDICTION, {}).get("psi", 0.0),
+            "features_warning": sum(entry["status"] == "warning" for entry in features.values()),
+            "features_drifting": sum(entry["status"] == "drift" for entry in features.values()),
+            "psi": {name: entry["psi"] for name, entry in features.items()},
+        }
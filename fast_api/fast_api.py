@@ -1,34 +1,74 @@
 # Importing required libraries
-from fastapi import FastAPI, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, ValidationError, Field
-from typing import Optional, List, Dict, Any
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Optional, List, Dict, Any, Literal
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.exceptions import RequestValidationError
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, date
+from contextlib import asynccontextmanager
 import logging
 import json
 import warnings
-import traceback
+
+from db import acquire_connection, db_pool, get_db_connection
+from bulk_ingest import PREDICTION_COLUMNS, QUARANTINE_COLUMNS, QUARANTINE_TABLE, bulk_insert
+from inference import micro_batcher, model_service
+from preprocessing import FEATURE_ORDER, encode_features
+from partitions import PartitionConfig, PartitionMaintainer
+from rollups import RollupRefresher, build_stats_queries
+from group_commit import GroupCommitWriter, QueueFull
+from validation import ValidationConfig, row_columns, split_rows
+from drift import DriftMonitor
+from columnar import (
+    ARROW_MEDIA_TYPE,
+    ColumnValidationError,
+    decode_arrow_predictions,
+    negotiate_format,
+    table_rows,
+)
+from metrics import MetricsMiddleware, configure_logging, record_rows, render_metrics, stage
+from streaming import (
+    SELECT_COLUMNS,
+    STREAM_MEDIA_TYPES,
+    build_query,
+    decode_cursor,
+    encode_cursor,
+    pa,
+    stream_predictions,
+)
+
+# Rows per page for the JSON listing
+DEFAULT_PAGE_SIZE = 1000
+
+# Upcoming monthly partitions, created at startup and then on a schedule
+partition_maintainer = PartitionMaintainer(db_pool)
+
+# Background refresh of the dashboard rollups
+rollup_refresher = RollupRefresher(db_pool)
+
+# Background group commits for /save_predictions/async
+group_writer = GroupCommitWriter(db_pool, on_commit=rollup_refresher.notify)
+
+# Data-quality checks before saving and scoring
+# (domains follow the model's encoder; see ModelService.load)
+row_validator = model_service.validator
+
+# Feature and prediction drift of saved rows against the training baseline
+drift_monitor = DriftMonitor()
 
 warnings.filterwarnings("ignore")
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging (level and format from AQUA_LOG_LEVEL / AQUA_LOG_FORMAT)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
-# Database Configuration
-class DatabaseConfig:
-    DBNAME = "aqua"
-    USER = "postgres"
-    PASSWORD = "Charanrocks@2597"
-    HOST = "localhost"
-    PORT = "5432"
-
-# Defining prediction class
-class Prediction(BaseModel):
+# Defining the model input class (the 22 features)
+class PredictionInput(BaseModel):
     ph: float
     iron: float
     nitrate: float
@@ -51,28 +91,45 @@ class Prediction(BaseModel):
     month: int
     day: int
     time_of_day: str
+
+
+# Defining prediction class
+class Prediction(PredictionInput):
     prediction: int
 
 
-# Database Connection Dependency
-def get_db_connection():
+# App lifespan: open the connection pool once and close it on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     try:
-        conn = psycopg2.connect(
-            host="localhost",  # Force IPv4
-            user=DatabaseConfig.USER,
-            password=DatabaseConfig.PASSWORD,
-            dbname=DatabaseConfig.DBNAME,
-            connect_timeout=3,
-        )
-        logger.info("Successfully connected to database")
-        return conn
+        db_pool.open()
     except psycopg2.OperationalError as e:
-        logger.error(f"Connection failed: {e}")
-        raise HTTPException(status_code=503, detail=f"Database connection failed: {e}")
+        # Keep serving; the pool retries on the first request
+        logger.error("Could not open database pool at startup: %s", e)
+    try:
+        model_service.load()
+    except (OSError, ValueError) as e:
+        # /predict answers 503 until a model is available
+        logger.error("Could not load model at startup: %s", e)
+    try:
+        drift_monitor.load(model_service.path)
+    except (OSError, ValueError) as e:
+        # Drift monitoring stays off; saving is unaffected
+        logger.error("Could not load drift baseline at startup: %s", e)
+    await micro_batcher.start()
+    await partition_maintainer.start()
+    await rollup_refresher.start()
+    group_writer.start()
+    yield
+    group_writer.stop()
+    await rollup_refresher.stop()
+    await partition_maintainer.stop()
+    await micro_batcher.stop()
+    db_pool.close()
 
 
 # FastAPI App
-app = FastAPI(title="Water Quality Prediction API")
+app = FastAPI(title="Water Quality Prediction API", lifespan=lifespan)
 
 # CORS Middleware
 app.add_middleware(
@@ -83,6 +140,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, payload size and optional profiling
+app.add_middleware(MetricsMiddleware)
+
 
 # Enhancing Validation Error Handler
 @app.exception_handler(ValidationError)
@@ -93,134 +153,412 @@ async def validation_exception_handler(request: Request, exc: ValidationError):
     # Log the full request body for debugging
     try:
         body = await request.json()
-        logger.error(f"Request Body: {body}")
+        logger.error("Request Body: %s", body)
     except Exception as e:
-        logger.error(f"Could not read request body: {e}")
+        logger.error("Could not read request body: %s", e)
 
     # Detailed error logging
     logger.error("Validation Errors:")
     for error in exc.errors():
-        logger.error(f"Location: {error.get('loc')}")
-        logger.error(f"Type: {error.get('type')}")
-        logger.error(f"Message: {error.get('msg')}")
+        logger.error("Location: %s", error.get("loc"))
+        logger.error("Type: %s", error.get("type"))
+        logger.error("Message: %s", error.get("msg"))
         logger.error("---")
 
     return JSONResponse(
         status_code=422, content={"detail": "Validation Error", "errors": exc.errors()}
     )
 
+
+# Rows in PREDICTION_COLUMNS order
+def prediction_rows(predictions):
+    return (
+        (
+            pred.ph,
+            pred.iron,
+            pred.nitrate,
+            pred.chloride,
+            pred.lead,
+            pred.zinc,
+            pred.color,
+            pred.turbidity,
+            pred.fluoride,
+            pred.copper,
+            pred.odor,
+            pred.sulfate,
+            pred.conductivity,
+            pred.chlorine,
+            pred.manganese,
+            pred.tds,
+            pred.source,
+            pred.water_temp,
+            pred.air_temp,
+            pred.month,
+            pred.day,
+            pred.time_of_day,
+            pred.prediction,
+        )
+        for pred in predictions
+    )
+
+
+# Validator of a JSON save body, built once
+PREDICTION_LIST = TypeAdapter(List[Prediction])
+
+# Request body of the save endpoints: JSON (default) or an Arrow IPC stream
+PREDICTIONS_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": Prediction.schema()}},
+            ARROW_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+async def read_prediction_rows(request: Request):
+    """
+    Receive a save body and parse it in the threadpool (see `parse_prediction_rows`)
+
+    Parsing and validating a large upload is CPU-bound; on the event loop it
+    would stall every other request, the /predict micro-batcher included.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    body = await request.body()
+    return await run_in_threadpool(parse_prediction_rows, content_type, body)
+
+
+def parse_prediction_rows(content_type, body):
+    """
+    Parse and validate a save body by Content-Type
+
+    - Arrow IPC streams are validated column by column, with no per-row models
+    - Anything else is parsed as a JSON list of `Prediction` objects
+    - Malformed bodies raise the usual 422, with the errors FastAPI's own
+      body parsing gives (`loc` starting with "body"); rows that parse but
+      fail the data-quality rules are split off for the quarantine table
+    - Returns (good rows, quarantine rows, violation counts per rule, drift
+      sample), rows as tuples in PREDICTION_COLUMNS / QUARANTINE_COLUMNS order
+    """
+    if content_type == ARROW_MEDIA_TYPE:
+        if pa is None:
+            raise HTTPException(status_code=415, detail="Arrow ingest requires pyarrow")
+        try:
+            with stage("validation"):
+                table = decode_arrow_predictions(body)
+        except ColumnValidationError as e:
+            raise RequestValidationError(e.errors)
+        columns = {name: table.column(name).to_numpy(zero_copy_only=False) for name in PREDICTION_COLUMNS}
+        return check_rows(list(table_rows(table)), columns)
+
+    try:
+        with stage("validation"):
+            predictions = PREDICTION_LIST.validate_python(json.loads(body))
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+    except ValueError as e:
+        # json.JSONDecodeError, or a body that is not UTF-8
+        raise RequestValidationError([{
+            "type": "json_invalid",
+            "loc": ("body", getattr(e, "pos", 0)),
+            "msg": "JSON decode error",
+            "input": {},
+            "ctx": {"error": getattr(e, "msg", str(e))},
+        }])
+    rows = list(prediction_rows(predictions))
+    return check_rows(rows, row_columns(rows))
+
+
+def check_rows(rows, columns):
+    """
+    Run the data-quality rules over whole columns and split off the bad rows
+
+    The drift sample (columns and good-row mask) is returned rather than
+    counted: `observe_drift` adds it once the rows are committed or queued,
+    so failed saves and client retries are not counted.
+    """
+    if not rows:
+        return rows, [], {}, None
+    if not ValidationConfig.ENABLED:
+        return rows, [], {}, (columns, None)
+    with stage("validation"):
+        result = row_validator.validate(columns, PREDICTION_COLUMNS)
+        good, quarantined = split_rows(rows, result)
+    if quarantined:
+        logger.warning("Quarantining %d of %d rows: %s", len(quarantined), len(rows), result.counts)
+    return good, quarantined, result.counts, (columns, result.good)
+
+
+def observe_drift(sample):
+    """Add a saved batch's good rows to the drift counts"""
+    if sample is None:
+        return
+    columns, mask = sample
+    with stage("monitoring"):
+        drift_monitor.observe(columns, mask)
+
+
 # Saving the predictions
-@app.post("/save_predictions/")
-def save_predictions(
-    predictions: List[Prediction],  # Accept a list of Prediction objects
-    conn: psycopg2.extensions.connection = Depends(get_db_connection),
-):
+@app.post("/save_predictions/", openapi_extra=PREDICTIONS_BODY)
+async def save_predictions(request: Request):
+    """
+    Save a list of predictions (JSON array or Arrow IPC stream)
+
+    The body is received and validated before a pooled connection is taken,
+    so slow uploads never hold one.
     """
-    Save a list of predictions with extensive logging and error handling
+    rows, quarantined, violations, sample = await read_prediction_rows(request)
+
+    # Log incoming predictions
+    logger.info("Received %d predictions", len(rows) + len(quarantined))
+    record_rows(len(rows) + len(quarantined))
+
+    # The insert blocks, so it runs in the threadpool
+    return await run_in_threadpool(insert_predictions, rows, quarantined, violations, sample)
+
+
+def insert_predictions(rows, quarantined=(), violations=None, sample=None):
     """
+    Save row tuples with extensive logging and error handling
+
+    Borrows a pooled connection for the insert only (503 when none is
+    available). Quarantined rows go to their own table in the same transaction.
+    The drift `sample` is counted only after the commit.
+    """
+    conn = acquire_connection()
     try:
-        # Log incoming predictions
-        logger.info(f"Received {len(predictions)} predictions")
-
-        with conn.cursor() as cur:
-            # Query for bulk insertion
-            query = """
-                INSERT INTO predictions (
-                    ph, iron, nitrate, chloride, lead, zinc, color, turbidity,
-                    fluoride, copper, odor, sulfate, conductivity, chlorine,
-                    manganese, tds, source, water_temp, air_temp, month, day,
-                    time_of_day, prediction, timestamp
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP
-                )
-            """
-
-            # Data for bulk insertion
-            data = [
-                (
-                    pred.ph,
-                    pred.iron,
-                    pred.nitrate,
-                    pred.chloride,
-                    pred.lead,
-                    pred.zinc,
-                    pred.color,
-                    pred.turbidity,
-                    pred.fluoride,
-                    pred.copper,
-                    pred.odor,
-                    pred.sulfate,
-                    pred.conductivity,
-                    pred.chlorine,
-                    pred.manganese,
-                    pred.tds,
-                    pred.source,
-                    pred.water_temp,
-                    pred.air_temp,
-                    pred.month,
-                    pred.day,
-                    pred.time_of_day,
-                    pred.prediction,
-                )
-                for pred in predictions
-            ]
-
-            # Executing the bulk insertion
-            cur.executemany(query, data)
+        # Streaming the rows with COPY (falls back to multi-row INSERT)
+        with stage("ingest"):
+            stats = bulk_insert(conn, rows)
+            if quarantined:
+                bulk_insert(conn, quarantined, table=QUARANTINE_TABLE, columns=QUARANTINE_COLUMNS)
             conn.commit()
+        observe_drift(sample)
+        rollup_refresher.notify()
 
-            logger.info(f"Successfully saved {len(predictions)} predictions")
-            return {"message": f"{len(predictions)} predictions saved successfully"}
+        logger.info(
+            "Successfully saved %d predictions via %s in %d chunk(s)",
+            stats["rows"], stats["method"], len(stats["chunks"]),
+        )
+        return {
+            "message": f"{stats['rows']} predictions saved successfully",
+            "method": stats["method"],
+            "chunks": stats["chunks"],
+            "quarantined": len(quarantined),
+            "violations": violations or {},
+        }
 
     except Exception as e:
-        traceback.print_exc()
-        logger.error(f"Unexpected error saving predictions: {e}")
+        # Traceback goes through the configured (possibly JSON) log handler
+        logger.exception("Unexpected error saving predictions: %s", e)
         conn.rollback()  # Rollback in case of error
         raise HTTPException(
             status_code=500, detail=f"Error saving predictions: {str(e)}"
         )
+    finally:
+        db_pool.putconn(conn)
+
+
+# Accepting predictions for a background group commit (202: queued, not yet durable)
+@app.post("/save_predictions/async", status_code=202, openapi_extra=PREDICTIONS_BODY)
+async def save_predictions_async(request: Request):
+    """
+    Queue a list of predictions (JSON array or Arrow IPC stream) and return immediately
+
+    Rows from concurrent requests are merged into one COPY and one commit.
+    Answers 503 with Retry-After when the queue is full.
+    """
+    rows, quarantined, violations, sample = await read_prediction_rows(request)
+    record_rows(len(rows) + len(quarantined))
+    try:
+        group_writer.submit(rows, quarantined)
+    except QueueFull as e:
+        logger.warning("Async ingest queue full: %s", e)
+        raise HTTPException(status_code=503, detail=f"Ingest queue full: {e}",
+                            headers={"Retry-After": "1"})
+    await run_in_threadpool(observe_drift, sample)
+    return {"message": f"{len(rows)} predictions queued", "queued": len(rows),
+            "quarantined": len(quarantined), "violations": violations}
+
+
+def _encode_or_422(records):
+    if ValidationConfig.ENABLED:
+        with stage("validation"):
+            result = row_validator.validate(
+                {name: [record[name] for record in records] for name in FEATURE_ORDER}
+            )
+        if result.counts:
+            raise HTTPException(status_code=422, detail={
+                "message": f"{result.bad_count} input(s) failed data-quality checks",
+                "violations": result.counts,
+                "rows": [i for i, good in enumerate(result.good) if not good][:100],
+            })
+    try:
+        return encode_features(records, model_service.encoder)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+# Predicting a single sample (cache first, then merged with concurrent requests by the micro-batcher)
+@app.post("/predict")
+async def predict(item: PredictionInput):
+    if not model_service.ready:
+        raise HTTPException(status_code=503, detail="Model is not loaded")
+
+    features = _encode_or_422([item.dict()])
+    prediction = model_service.lookup(features[0])
+    if prediction is None:
+        prediction = await micro_batcher.submit(features[0])
+    record_rows(1)
+    return {"prediction": prediction.item()}
+
+
+# Predicting many samples in one vectorized call
+@app.post("/predict_batch")
+def predict_batch(items: List[PredictionInput]):
+    if not model_service.ready:
+        raise HTTPException(status_code=503, detail="Model is not loaded")
+    if not items:
+        return {"predictions": []}
+
+    features = _encode_or_422([item.dict() for item in items])
+    predictions = model_service.predict(features)
+    record_rows(len(predictions))
+    logger.info("Predicted %d samples", len(predictions))
+    return {"predictions": predictions.tolist()}
+
+
 # Function for fetching the predictions
 @app.get("/get_predictions/", response_model=List[Dict[str, Any]])
 def get_predictions(
-    params: Dict[str, Optional[date]] = Depends(lambda: {}),
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    format: Optional[Literal["json", "ndjson", "arrow", "parquet"]] = None,
+):
+    """
+    Fetch predictions newest first, with optional date filtering
+
+    - `start_date` / `end_date` filter on the prediction timestamp (inclusive days)
+    - `format=json` returns one page (default 1000 rows) as a list of
+      dictionaries; the `X-Next-Cursor` header holds the token for the next page
+    - `format=ndjson|arrow|parquet` streams every matching row (or `limit` rows)
+      from a server-side cursor with constant memory
+    - `cursor` resumes after the last row of a previous page
+    - Without `format`, the Accept header picks it (JSON by default)
+    """
+    format = format or negotiate_format(request.headers.get("accept"))
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format != "json":
+        if format in ("arrow", "parquet") and pa is None:
+            raise HTTPException(status_code=406, detail=f"{format} export requires pyarrow")
+
+        query, query_params = build_query(start_date, end_date, after, limit)
+        conn = acquire_connection()
+        chunks = stream_predictions(conn, db_pool.putconn, query, query_params, format)
+        try:
+            # Runs the query now so database errors still produce a proper status
+            with stage("query"):
+                next(chunks)
+        except psycopg2.Error as e:
+            logger.error("Database query error: %s", e)
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        return StreamingResponse(chunks, media_type=STREAM_MEDIA_TYPES[format])
+
+    page_size = limit or DEFAULT_PAGE_SIZE
+    query, query_params = build_query(start_date, end_date, after, page_size)
+    conn = acquire_connection()
+    try:
+        with stage("query"), conn.cursor() as cur:
+            cur.execute(query, query_params)
+            rows = cur.fetchall()
+        conn.rollback()
+    except psycopg2.Error as e:
+        logger.error("Database query error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        db_pool.putconn(conn)
+
+    if len(rows) == page_size:
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last[-1], last[0])
+
+    logger.info("Retrieved %d prediction records", len(rows))
+    record_rows(len(rows))
+    with stage("serialization"):
+        return [dict(zip(SELECT_COLUMNS, row)) for row in rows]
+
+
+# Aggregated prediction history for dashboards (served from the rollup tables)
+@app.get("/predictions/stats")
+def prediction_stats(
+    granularity: Literal["hour", "day"] = "day",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    source: Optional[str] = None,
+    time_of_day: Optional[str] = None,
+    metric: Optional[str] = None,
     conn: psycopg2.extensions.connection = Depends(get_db_connection),
 ):
     """
-    Fetch predictions with optional date filtering
+    Prediction counts by class and reading statistics per bucket
 
-    - Accepts a dictionary `params` with `start_date` and `end_date`
-    - Returns results as a list of dictionaries
-    - Handles empty result sets
+    - `classes`: rows per (bucket, source, time_of_day, prediction)
+    - `metrics`: count, mean, p50, p95, min and max of each reading per
+      (bucket, source, time_of_day); `metric` narrows it to one reading
+    - Rollups lag raw rows by at most one refresh interval
     """
-    start_date = params.get("start_date")
-    end_date = params.get("end_date")
+    (class_query, class_params), (metric_query, metric_params) = build_stats_queries(
+        granularity, start_date, end_date, source, time_of_day, metric
+    )
+    try:
+        with stage("query"), conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(class_query, class_params)
+            classes = cur.fetchall()
+            cur.execute(metric_query, metric_params)
+            metrics = cur.fetchall()
+        conn.rollback()
+    except psycopg2.Error as e:
+        logger.error("Database query error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    return {"granularity": granularity, "classes": classes, "metrics": metrics}
 
+
+# Rebuilding the rollups now (`full=true` rebuilds all history)
+@app.post("/admin/rollups")
+def refresh_rollups(full: bool = False):
     try:
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            if start_date and end_date:
-                query = """
-                    SELECT * FROM predictions 
-                    WHERE timestamp BETWEEN %s AND %s 
-                    ORDER BY timestamp DESC
-                """
-                cur.execute(query, (start_date, end_date))
-            else:
-                query = "SELECT * FROM predictions ORDER BY timestamp DESC LIMIT 1000"
-                cur.execute(query)
-
-            results = cur.fetchall()
-
-            if not results:
-                return []
-
-            # Convering the results from DictCursor to a list of dictionaries
-            predictions = [dict(row) for row in results]
-
-            logger.info(f"Retrieved {len(predictions)} prediction records")
-            return predictions
+        return rollup_refresher.refresh(full)
     except psycopg2.Error as e:
-        logger.error(f"Database query error: {e}")
+        logger.error("Rollup refresh error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+# Creating upcoming partitions and applying retention now (also runs on a schedule)
+@app.post("/admin/partitions")
+def manage_partitions(
+    months_ahead: int = Query(PartitionConfig.MONTHS_AHEAD, ge=0),
+    retention_months: int = Query(PartitionConfig.RETENTION_MONTHS, ge=0),
+):
+    """
+    Create monthly partitions `months_ahead` months out and drop partitions
+    older than `retention_months` (0 keeps everything)
+    """
+    try:
+        return partition_maintainer.run(months_ahead, retention_months)
+    except psycopg2.Error as e:
+        logger.error("Partition maintenance error: %s", e)
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
@@ -232,10 +570,10 @@ async def debug_prediction(request: Request):
     """
     try:
         body = await request.json()
-        logger.debug(f"Debug Payload: {body}")
+        logger.debug("Debug Payload: %s", body)
         return {"received_payload": body}
     except Exception as e:
-        logger.error(f"Error in debug endpoint: {e}")
+        logger.error("Error in debug endpoint: %s", e)
         return {"error": str(e)}
 
 
@@ -243,3 +581,72 @@ async def debug_prediction(request: Request):
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "timestamp": datetime.now()}
+
+
+# Connection pool wait time and saturation
+@app.get("/health/db_pool")
+def db_pool_stats():
+    return db_pool.stats()
+
+
+# Model and micro-batcher status
+@app.get("/health/inference")
+def inference_stats():
+    return {"model_loaded": model_service.ready, **micro_batcher.stats()}
+
+
+# Async ingest queue depth and group commit sizes
+@app.get("/health/ingest_queue")
+def ingest_queue_stats():
+    return group_writer.stats()
+
+
+# Rollup refresh status
+@app.get("/health/rollups")
+def rollup_stats():
+    return rollup_refresher.stats()
+
+
+# Scheduled partition maintenance runs
+@app.get("/health/partitions")
+def partition_stats():
+    return partition_maintainer.stats()
+
+
+# Rows checked and rejected, per data-quality rule
+@app.get("/health/validation")
+def validation_stats():
+    return row_validator.stats()
+
+
+# Drift of the saved rows against the training baseline (PSI per feature, KS for numerics)
+@app.get("/health/drift")
+def drift_report():
+    return drift_monitor.report()
+
+
+# Prediction cache hit rate and latency saved
+@app.get("/health/prediction_cache")
+def prediction_cache_stats():
+    return {"model_version": model_service.version, **model_service.cache.stats()}
+
+
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    validation = row_validator.stats()
+    drift = drift_monitor.stats()
+    return render_metrics(
+        {
+            "db_pool": db_pool.stats(),
+            "inference": micro_batcher.stats(),
+            "prediction_cache": model_service.cache.stats(),
+            "rollups": rollup_refresher.stats(),
+            "partitions": partition_maintainer.stats(),
+            "ingest_queue": group_writer.stats(),
+            "validation": validation,
+            "validation_violations": validation["violations"],
+            "drift": drift,
+            "drift_psi": drift["psi"],
+        }
+    )
@@ -0,0 +1,313 @@
+# Importing required libraries
+import os
+import json
+import logging
+import argparse
+import threading
+
+import numpy as np
+import sklearn
+from sklearn.utils.fixes import parse_version
+
+from model_store import ModelStoreConfig, load_model, model_version
+
+logger = logging.getLogger(__name__)
+
+# sklearn >= 1.4 stores class fractions in `tree_.value` and no longer
+# normalizes them in `predict_proba`; older versions store weighted counts
+NORMALIZED_TREE_VALUES = parse_version(sklearn.__version__).release >= (1, 4)
+
+
+# Compiled forest Configuration
+class ForestConfig:
+    # "0" keeps sklearn's own predict everywhere
+    ENABLED = os.environ.get("AQUA_COMPILED_FOREST", "1") == "1"
+    # Rows traversed together; bounds the (rows x trees) temporaries
+    BLOCK_ROWS = int(os.environ.get("AQUA_FOREST_BLOCK_ROWS", "4096"))
+    # Larger calls go to sklearn's own predict: its C traversal wins once the
+    # per-step NumPy overhead is spread over enough rows (benchmarks/bench_forest.py)
+    MAX_ROWS = int(os.environ.get("AQUA_FOREST_MAX_ROWS", "128"))
+
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into array-backed node tables
+
+    - Every tree's nodes live in one set of arrays; all (row, tree) pairs
+      descend one level per step, and pairs that reached a leaf drop out, so
+      the work follows the actual path lengths rather than `max_depth`
+    - Calls with more than `max_rows` rows use sklearn's `predict_proba`
+      (loaded from the artifact on first use when built by `from_tables`);
+      `max_rows=None` always uses the tables
+    - Leaf class probabilities are taken as sklearn's `predict_proba` reads them:
+      as stored when `tree_.value` already holds fractions (sklearn >= 1.4,
+      NORMALIZED_TREE_VALUES), otherwise normalized once at compile time
+    - Results are bit-identical to sklearn's sequential `predict_proba` and
+      `predict`: inputs are cast to float32 and compared against the float64
+      thresholds, and tree probabilities are summed in tree order
+    - `estimator` keeps the original forest (None when loaded with `load_tables`
+      until a large call needs it)
+    """
+
+    # Node tables written by `save_tables`, one .npy file each
+    TABLES = ("roots", "feature", "threshold", "children", "missing_go_to_left", "leaf_proba")
+
+    def __init__(self, forest, block_rows=ForestConfig.BLOCK_ROWS, max_rows=ForestConfig.MAX_ROWS):
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        self.estimator = forest
+        self.model_path = None
+        self.n_jobs = forest.n_jobs
+        self._estimator_lock = threading.Lock()
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+        self.block_rows = block_rows
+        self.max_rows = max_rows
+
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        n_classes = len(forest.classes_)
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+
+        features, thresholds, children, missing_left, probas = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            children.append(np.column_stack([
+                np.where(leaf, nodes, tree.children_left),
+                np.where(leaf, nodes, tree.children_right),
+            ]) + offset)
+            # sklearn >= 1.3 routes NaN by a per-node flag; older versions send it right
+            flags = getattr(tree, "missing_go_to_left", None)
+            missing_left.append(np.zeros(tree.node_count, bool) if flags is None else flags.astype(bool))
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            proba = np.array(tree.value[:, 0, :n_classes], dtype=np.float64)
+            if not NORMALIZED_TREE_VALUES:
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+            probas.append(proba)
+
+        self.roots = offsets.astype(np.int32)
+        self.feature = np.concatenate(features).astype(np.int32)
+        self.threshold = np.concatenate(thresholds).astype(np.float64)
+        self.children = np.concatenate(children).astype(np.int32)
+        self.missing_go_to_left = np.concatenate(missing_left)
+        self.leaf_proba = np.concatenate(probas)
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+    @classmethod
+    def from_tables(cls, directory, model_path=None, n_jobs=None, block_rows=ForestConfig.BLOCK_ROWS,
+                    max_rows=ForestConfig.MAX_ROWS, mmap_mode=ModelStoreConfig.MMAP_MODE):
+        """
+        Rebuild from `save_tables` output without unpickling the forest
+
+        With `mmap_mode="r"` the tables are read-only views of the page cache,
+        so every process serving the same artifact shares one copy. The forest
+        at `model_path` is unpickled (with `n_jobs` threads) only when a call
+        larger than `max_rows` comes in; without a path every call uses the tables.
+        """
+        with open(os.path.join(directory, TABLES_META)) as f:
+            meta = json.load(f)
+        compiled = cls.__new__(cls)
+        compiled.estimator = None
+        compiled.model_path = model_path
+        compiled.n_jobs = n_jobs
+        compiled._estimator_lock = threading.Lock()
+        compiled.classes_ = np.asarray(meta["classes"])
+        compiled.n_features_in_ = meta["n_features_in"]
+        compiled.max_depth = meta["max_depth"]
+        compiled.block_rows = block_rows
+        compiled.max_rows = max_rows
+        for name in cls.TABLES:
+            # Plain ndarray views: indexing a np.memmap would wrap every result
+            table = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+            setattr(compiled, name, np.asarray(table))
+        return compiled
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Leaf node (global index) of every row in every tree: (rows, trees)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        has_missing = bool(np.isnan(X).any())
+        values_flat = X.ravel()
+        # One entry per (row, tree) pair, row-major like the result
+        nodes = np.tile(self.roots, len(X))
+        offsets = np.repeat(np.arange(len(X), dtype=np.intp) * X.shape[1], self.n_estimators)
+        pairs = np.arange(len(nodes))
+        current = nodes
+        while len(pairs):
+            values = values_flat[offsets + self.feature[current]]
+            go_right = ~(values <= self.threshold[current])
+            if has_missing:
+                missing = np.isnan(values)
+                go_right[missing] = ~self.missing_go_to_left[current[missing]]
+            current = self.children[current, go_right.view(np.int8)]
+            nodes[pairs] = current
+            # Leaves point to themselves: keep only pairs still at a split
+            inner = self.children[current, 0] != current
+            pairs, current, offsets = pairs[inner], current[inner], offsets[inner]
+        return nodes.reshape(len(X), self.n_estimators)
+
+    def sklearn_estimator(self):
+        """The sklearn forest, unpickled on first use for table-loaded forests (None without a path)"""
+        if self.estimator is None and self.model_path is not None:
+            with self._estimator_lock:
+                if self.estimator is None:
+                    model = load_model(self.model_path)
+                    model.n_jobs = self.n_jobs
+                    logger.info("Loaded sklearn forest from %s for calls over %d rows",
+                                self.model_path, self.max_rows)
+                    self.estimator = model
+        return self.estimator
+
+    def predict_proba(self, X):
+        if self.max_rows is not None and len(X) > self.max_rows:
+            estimator = self.sklearn_estimator()
+            if estimator is not None:
+                return estimator.predict_proba(X)
+        return self.predict_proba_tables(X)
+
+    def predict_proba_tables(self, X):
+        """`predict_proba` through the node tables, whatever the size of X"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+        proba = np.empty((len(X), len(self.classes_)), dtype=np.float64)
+        for start in range(0, len(X), self.block_rows):
+            leaves = self.apply(X[start:start + self.block_rows])
+            # add.accumulate is strictly sequential: tree 0 + tree 1 + ..., as sklearn sums
+            total = np.add.accumulate(self.leaf_proba[leaves], axis=1)[:, -1]
+            proba[start:start + len(leaves)] = total / self.n_estimators
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def stats(self):
+        return {
+            "trees": self.n_estimators,
+            "nodes": len(self.feature),
+            "max_depth": self.max_depth,
+            "max_rows": self.max_rows,
+            "sklearn_loaded": self.estimator is not None,
+            "table_bytes": sum(array.nbytes for array in (
+                self.feature, self.threshold, self.children, self.missing_go_to_left, self.leaf_proba
+            )),
+        }
+
+
+# Written last by `save_tables`: a tables directory without it is incomplete
+TABLES_META = "forest.json"
+
+
+def tables_path(model_path):
+    """Compiled tables next to a model: water_quality_model.pkl -> water_quality_model.forest/"""
+    return os.path.splitext(model_path)[0] + ".forest"
+
+
+def save_tables(compiled, model_path):
+    """
+    Write the node tables of `compiled` as .npy files next to the model at `model_path`
+
+    The sidecar records the model's version, so tables left over from an
+    older artifact are ignored by `load_tables`.
+    """
+    directory = tables_path(model_path)
+    os.makedirs(directory, exist_ok=True)
+    meta = os.path.join(directory, TABLES_META)
+    if os.path.exists(meta):
+        os.remove(meta)
+    for name in CompiledForest.TABLES:
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(compiled, name)))
+    with open(meta, "w") as f:
+        json.dump({
+            "model_version": model_version(model_path),
+            "classes": compiled.classes_.tolist(),
+            "n_features_in": int(compiled.n_features_in_),
+            "max_depth": int(compiled.max_depth),
+        }, f, indent=2)
+    logger.info("Saved compiled forest tables to %s", directory)
+
+
+def load_tables(model_path, n_jobs=None, mmap_mode=ModelStoreConfig.MMAP_MODE):
+    """The compiled tables saved for the model at `model_path`, or None if missing or stale"""
+    directory = tables_path(model_path)
+    try:
+        with open(os.path.join(directory, TABLES_META)) as f:
+            saved_version = json.load(f)["model_version"]
+    except FileNotFoundError:
+        return None
+    if saved_version != model_version(model_path):
+        logger.warning("Ignoring compiled tables at %s: saved for another model version", directory)
+        return None
+    return CompiledForest.from_tables(directory, model_path, n_jobs, mmap_mode=mmap_mode)
+
+
+def load_forest(model_path, n_jobs=None, enabled=ForestConfig.ENABLED):
+    """
+    Model for inference from the artifact at `model_path`
+
+    - Saved compiled tables are memory-mapped, shared by every process; a
+      process unpickles the forest too once it predicts more than
+      ForestConfig.MAX_ROWS rows in one call
+    - Otherwise the forest is unpickled and compiled in this process (a
+      private copy; run `python fast_api/forest.py <model>` once to save tables)
+    - Disabled or unsupported: sklearn's forest with `n_jobs` threads
+    """
+    if enabled:
+        compiled = load_tables(model_path, n_jobs)
+        if compiled is not None:
+            logger.info("Memory-mapped compiled forest: %s", compiled.stats())
+            return compiled
+    model = load_model(model_path)
+    # The artifact keeps the training-time n_jobs; the caller sets its own
+    model.n_jobs = n_jobs
+    return compile_forest(model, enabled)
+
+
+def compile_forest(model, enabled=ForestConfig.ENABLED):
+    """
+    Compile a fitted forest for inference, or return `model` unchanged
+
+    Anything that is not a single-output forest classifier (or a disabled
+    config) falls back to the model's own `predict`.
+    """
+    if not enabled or not hasattr(model, "estimators_") or not hasattr(model, "classes_"):
+        return model
+    try:
+        compiled = CompiledForest(model)
+    except (ValueError, AttributeError) as e:
+        logger.warning("Serving the model uncompiled: %s", e)
+        return model
+    logger.info("Compiled forest: %s", compiled.stats())
+    return compiled
+
+
+def check_parity(model, compiled, X):
+    """True when the compiled tables match sklearn bit for bit on X (even above `max_rows`)"""
+    model_proba = model.predict_proba(X)
+    compiled_proba = compiled.predict_proba_tables(X)
+    compiled_classes = compiled.classes_.take(np.argmax(compiled_proba, axis=1), axis=0)
+    return (np.array_equal(model_proba, compiled_proba)
+            and np.array_equal(model.predict(X), compiled_classes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Save the compiled node tables of a model artifact")
+    parser.add_argument("model", help="joblib artifact of a fitted RandomForestClassifier")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    compiled = CompiledForest(load_model(args.model))
+    save_tables(compiled, args.model)
+    print(f"Saved {compiled.stats()} to {tables_path(args.model)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# Importing required libraries
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from datetime import datetime
+from itertools import chain
+
+import psycopg2
+
+from bulk_ingest import PREDICTION_COLUMNS, QUARANTINE_COLUMNS, QUARANTINE_TABLE, bulk_insert
+from db import PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+
+# Async ingest Configuration
+class GroupCommitConfig:
+    # Rows accepted but not yet committed; beyond this new requests get a 503
+    MAX_PENDING_ROWS = int(os.environ.get("AQUA_INGEST_MAX_PENDING", "500000"))
+    # Rows written in one transaction
+    MAX_GROUP_ROWS = int(os.environ.get("AQUA_INGEST_GROUP_ROWS", "50000"))
+    # How long the first queued batch waits for company (milliseconds)
+    MAX_WAIT_MS = float(os.environ.get("AQUA_INGEST_MAX_WAIT_MS", "50"))
+    # Attempts per commit on connection errors, backing off from RETRY_BASE_MS
+    # (doubling, capped at RETRY_MAX_MS): about a minute with the defaults
+    RETRY_ATTEMPTS = int(os.environ.get("AQUA_INGEST_RETRY_ATTEMPTS", "15"))
+    RETRY_BASE_MS = float(os.environ.get("AQUA_INGEST_RETRY_BASE_MS", "100"))
+    RETRY_MAX_MS = float(os.environ.get("AQUA_INGEST_RETRY_MAX_MS", "5000"))
+    # JSON lines of accepted batches that could not be committed
+    DEAD_LETTER_PATH = os.environ.get("AQUA_INGEST_DEAD_LETTER", "ingest_dead_letter.jsonl")
+
+
+# The database or the pool is unavailable for now; the same commit may succeed later
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, PoolTimeout)
+
+
+class QueueFull(Exception):
+    """Raised when accepting a batch would exceed the pending row limit."""
+
+
+class GroupCommitWriter:
+    """
+    Accept prediction batches immediately and write them in group commits
+
+    - `submit` only enqueues; a background thread merges queued batches into
+      one `bulk_insert` (plus one into the quarantine table for rows that
+      failed validation) and one commit per group
+    - A group closes at `max_group_rows` rows or `max_wait` seconds after its
+      first batch
+    - Connection errors (TRANSIENT_ERRORS) retry the commit with exponential
+      backoff; meanwhile the queue fills and `submit` starts refusing work
+    - Any other error (e.g. a DataError in one request's rows) commits the
+      group's batches one by one, so only the failing batch is lost
+    - Batches that still fail are appended to the dead-letter file
+      (`dead_letter_path`) with the error, never silently dropped
+    - Accepted rows live in memory until committed; a crash loses them
+    - `on_commit` is called after each successful commit
+    """
+
+    def __init__(self, pool, on_commit=None,
+                 max_pending_rows=GroupCommitConfig.MAX_PENDING_ROWS,
+                 max_group_rows=GroupCommitConfig.MAX_GROUP_ROWS,
+                 max_wait=GroupCommitConfig.MAX_WAIT_MS / 1000,
+                 retry_attempts=GroupCommitConfig.RETRY_ATTEMPTS,
+                 dead_letter_path=GroupCommitConfig.DEAD_LETTER_PATH):
+        self.pool = pool
+        self.on_commit = on_commit
+        self.max_pending_rows = max_pending_rows
+        self.max_group_rows = max_group_rows
+        self.max_wait = max_wait
+        self.retry_attempts = retry_attempts
+        self.dead_letter_path = dead_letter_path
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+
+        # Metrics
+        self.pending_rows = 0
+        self.groups_total = 0
+        self.rows_committed = 0
+        self.rows_failed = 0
+        self.rejected_total = 0
+        self.retries_total = 0
+        self.split_groups_total = 0
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=30):
+        """Stop accepting work and flush what is already queued"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, rows, quarantined=()):
+        """
+        Queue lists of row tuples (and quarantine rows); raises QueueFull when
+        over the pending limit
+        """
+        size = len(rows) + len(quarantined)
+        with self._lock:
+            if self._stopping.is_set() or self.pending_rows + size > self.max_pending_rows:
+                self.rejected_total += 1
+                raise QueueFull(f"{self.pending_rows} rows already pending")
+            self.pending_rows += size
+        self._queue.put((rows, quarantined))
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        group = [first]
+        size = _size(first)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_group_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Stop marker: flush this group, then exit on the next round
+                self._queue.put(None)
+                break
+            group.append(item)
+            size += _size(item)
+        return group
+
+    def _run(self):
+        while True:
+            group = self._collect()
+            if group is None:
+                return
+            size = sum(_size(item) for item in group)
+            try:
+                self._commit_with_retry(group)
+            except TRANSIENT_ERRORS as e:
+                self._dead_letter(group, e)
+            except Exception as e:
+                if len(group) == 1:
+                    self._dead_letter(group, e)
+                else:
+                    # One bad batch must not take its neighbours down with it
+                    logger.warning("Group commit of %d batches failed (%s); committing them one by one",
+                                   len(group), e)
+                    self.split_groups_total += 1
+                    for item in group:
+                        try:
+                            self._commit_with_retry([item])
+                        except Exception as e:
+                            self._dead_letter([item], e)
+            finally:
+                with self._lock:
+                    self.pending_rows -= size
+
+    def _commit(self, group):
+        with self.pool.connection() as conn:
+            bulk_insert(conn, chain.from_iterable(rows for rows, _ in group))
+            quarantined = list(chain.from_iterable(bad for _, bad in group))
+            if quarantined:
+                bulk_insert(conn, quarantined, table=QUARANTINE_TABLE, columns=QUARANTINE_COLUMNS)
+            conn.commit()
+        self.groups_total += 1
+        self.rows_committed += sum(_size(item) for item in group)
+        if self.on_commit is not None:
+            self.on_commit()
+
+    def _commit_with_retry(self, group):
+        # Raises the last transient error once the attempts are used up
+        for attempt in range(self.retry_attempts):
+            try:
+                return self._commit(group)
+            except TRANSIENT_ERRORS as e:
+                if attempt + 1 == self.retry_attempts:
+                    raise
+                self.retries_total += 1
+                delay = min(GroupCommitConfig.RETRY_BASE_MS * 2 ** attempt, GroupCommitConfig.RETRY_MAX_MS) / 1000
+                logger.warning("Group commit failed (%s); retrying in %.1fs", e, delay)
+                # Stopping cuts the waits short; the attempts stay bounded
+                self._stopping.wait(delay)
+
+    def _dead_letter(self, group, error):
+        size = sum(_size(item) for item in group)
+        self.rows_failed += size
+        logger.error("Commit of %d rows failed: %s; writing them to %s", size, error, self.dead_letter_path)
+        try:
+            with open(self.dead_letter_path, "a") as f:
+                for rows, quarantined in group:
+                    f.write(json.dumps({
+                        "failed_at": datetime.now().isoformat(),
+                        "error": str(error),
+                        "columns": PREDICTION_COLUMNS,
+                        "rows": rows,
+                        "quarantine_columns": QUARANTINE_COLUMNS,
+                        "quarantined": list(quarantined),
+                    }, default=_json_value) + "\n")
+        except OSError as e:
+            logger.error("Could not write the dead-letter file %s: %s", self.dead_letter_path, e)
+
+    def stats(self):
+        return {
+            "pending_rows": self.pending_rows,
+            "max_pending_rows": self.max_pending_rows,
+            "groups_total": self.groups_total,
+            "rows_committed": self.rows_committed,
+            "rows_failed": self.rows_failed,
+            "rejected_total": self.rejected_total,
+            "retries_total": self.retries_total,
+            "split_groups_total": self.split_groups_total,
+            "avg_group_rows": self.rows_committed / self.groups_total if self.groups_total else 0.0,
+        }
+
+
+def _size(item):
+    rows, quarantined = item
+    return len(rows) + len(quarantined)
+
+
+def _json_value(value):
+    # NumPy scalars from Arrow batches
+    return value.item() if hasattr(value, "item") else str(value)
@@ -0,0 +1,192 @@
+# Importing required libraries
+import os
+import time
+import asyncio
+import logging
+
+import numpy as np
+
+from forest import load_forest
+from model_store import load_metadata, model_version
+from preprocessing import DEFAULT_ENCODER, FEATURE_ORDER, load_encoder
+from prediction_cache import PredictionCache, feature_keys
+from validation import RowValidator
+from metrics import stage
+
+logger = logging.getLogger(__name__)
+
+
+# Inference Configuration
+class InferenceConfig:
+    MODEL_PATH = os.environ.get("AQUA_MODEL_PATH", "water_quality_model.pkl")
+    # Largest number of single-row requests merged into one predict call
+    MAX_BATCH_SIZE = int(os.environ.get("AQUA_MAX_BATCH_SIZE", "256"))
+    # How long the first request of a batch waits for company (milliseconds)
+    MAX_WAIT_MS = float(os.environ.get("AQUA_MAX_WAIT_MS", "5"))
+    # Forest threads per predict call (-1: all cores); 1 suits small micro-batches
+    PREDICT_N_JOBS = int(os.environ.get("AQUA_PREDICT_N_JOBS", "1"))
+
+
+def check_metadata(path, encoder):
+    """
+    Refuse a model whose training metadata disagrees with how serving encodes rows
+
+    - `feature_order` must be FEATURE_ORDER: serving builds columns in that order
+    - `categories` must be the encoder's: the codes the trees split on
+    - Artifacts saved without metadata are accepted as they are
+    """
+    metadata = load_metadata(path)
+    if metadata is None:
+        logger.warning("No training metadata for %s; feature order and categories are unchecked", path)
+        return
+    if metadata.get("feature_order") != FEATURE_ORDER:
+        raise ValueError(f"Model {path} was trained on features {metadata.get('feature_order')}, "
+                         f"serving sends {FEATURE_ORDER}")
+    if metadata.get("categories") != encoder.categories:
+        raise ValueError(f"Model {path} was trained with categories {metadata.get('categories')}, "
+                         f"its encoder has {encoder.categories}")
+
+
+class ModelService:
+    """
+    Holds the trained RandomForest in memory for the life of the API process
+
+    Predictions are cached per feature vector and model version. `encoder`
+    is the category encoding the model was trained with.
+    """
+
+    def __init__(self, path=InferenceConfig.MODEL_PATH, n_jobs=InferenceConfig.PREDICT_N_JOBS,
+                 cache=None):
+        self.path = path
+        self.n_jobs = n_jobs
+        self.cache = cache or PredictionCache()
+        self.model = None
+        self.version = None
+        self.encoder = DEFAULT_ENCODER
+        # Data-quality rules; categorical domains follow the loaded encoder
+        self.validator = RowValidator(categories=self.encoder.categories)
+
+    def load(self):
+        encoder = load_encoder(self.path)
+        check_metadata(self.path, encoder)
+        # Flattened node tables (memory-mapped when saved with the artifact):
+        # far less per-call overhead than sklearn's predict
+        self.model = load_forest(self.path, self.n_jobs)
+        self.version = model_version(self.path)
+        self.encoder = encoder
+        self.validator.set_categories(self.encoder.categories)
+        self.cache.clear()
+        logger.info("Loaded model %s from %s", self.version, self.path)
+
+    @property
+    def ready(self):
+        return self.model is not None
+
+    def predict(self, features):
+        """Predict every row, answering repeated rows from the cache"""
+        with stage("inference"):
+            return self.cache.predict(features, self.model.predict, self.version)
+
+    def lookup(self, row):
+        """Cached prediction for one encoded row, or None"""
+        if not self.cache.enabled:
+            return None
+        return self.cache.get(feature_keys(row[None, :], self.version)[0])
+
+    def compute(self, features):
+        """Predict without a cache lookup and store the results (rows already missed)"""
+        started = time.perf_counter()
+        with stage("inference"):
+            predictions = self.model.predict(features)
+        if self.cache.enabled:
+            self.cache.put_many(feature_keys(features, self.version), predictions,
+                                time.perf_counter() - started)
+        return predictions
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-row predictions into vectorized predict calls
+
+    - The first queued row waits at most `max_wait` seconds for more rows
+    - A batch is flushed as soon as it reaches `max_batch_size` rows
+    - `predict` runs in the default executor so the event loop stays free
+    """
+
+    def __init__(self, predict, max_batch_size=InferenceConfig.MAX_BATCH_SIZE,
+                 max_wait=InferenceConfig.MAX_WAIT_MS / 1000):
+        self.predict = predict
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._queue = None
+        self._worker = None
+
+        # Metrics
+        self.batches_total = 0
+        self.rows_total = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, row):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            rows = np.vstack([row for row, _ in batch])
+            try:
+                predictions = await loop.run_in_executor(None, self.predict, rows)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches_total += 1
+            self.rows_total += len(batch)
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches_total": self.batches_total,
+            "rows_total": self.rows_total,
+            "avg_batch_size": self.rows_total / self.batches_total if self.batches_total else 0.0,
+        }
+
+
+# Shared model and batcher, started by the app lifespan
+model_service = ModelService()
+micro_batcher = MicroBatcher(model_service.compute)
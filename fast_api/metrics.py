@@ -0,0 +1,261 @@
+# Importing required libraries
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.routing import Match
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # Falls back to cProfile
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+
+# Metrics Configuration
+class MetricsConfig:
+    LOG_LEVEL = os.environ.get("AQUA_LOG_LEVEL", "INFO").upper()
+    # "json" for one JSON object per line, anything else for plain text
+    LOG_FORMAT = os.environ.get("AQUA_LOG_FORMAT", "text")
+    # Requests carrying `X-Profile: 1` are profiled only when this is set
+    PROFILING_ENABLED = os.environ.get("AQUA_PROFILING", "0") == "1"
+    PROFILE_DIR = os.environ.get("AQUA_PROFILE_DIR", "profiles")
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+BYTE_BUCKETS = (256, 1_024, 16_384, 131_072, 1_048_576, 16_777_216, 134_217_728)
+
+
+class Histogram:
+    """
+    Prometheus-style cumulative histogram with one series per label tuple
+    """
+
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                base = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+                prefix = base + "," if base else ""
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f"{self.name}_sum{{{base}}} {total}")
+                lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "aqua_request_duration_seconds", "Request latency by route",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "aqua_stage_duration_seconds",
+    "Time spent in db_connect, query, validation, monitoring, ingest, serialization and inference",
+    ("stage",), LATENCY_BUCKETS,
+)
+REQUEST_ROWS = Histogram(
+    "aqua_request_rows", "Rows read, written or predicted per request",
+    ("route",), ROW_BUCKETS,
+)
+PAYLOAD_BYTES = Histogram(
+    "aqua_payload_bytes", "Request and response body size",
+    ("route", "direction"), BYTE_BUCKETS,
+)
+HISTOGRAMS = (REQUEST_SECONDS, STAGE_SECONDS, REQUEST_ROWS, PAYLOAD_BYTES)
+
+# Route template of the request being handled, for `record_rows`
+_current_route = ContextVar("current_route", default=None)
+
+
+@contextmanager
+def stage(name):
+    """Time a block into the stage histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, name)
+
+
+def record_rows(count):
+    """Record how many rows the current request handled"""
+    route = _current_route.get()
+    if route is not None:
+        REQUEST_ROWS.observe(count, route)
+
+
+def render_metrics(gauges):
+    """
+    Prometheus text exposition of every histogram plus `gauges`
+
+    `gauges` maps a metric prefix to a stats dict (e.g. `db_pool.stats()`);
+    numeric values become `aqua_<prefix>_<key>` gauges.
+    """
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for prefix, stats in gauges.items():
+        for key, value in stats.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                lines.append(f"aqua_{prefix}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and payload sizes per route
+
+    Pure ASGI (no BaseHTTPMiddleware) so streaming responses are not buffered.
+    Requests with `X-Profile: 1` are profiled when profiling is enabled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+        response_bytes = [0]
+        route_token = _current_route.set(_route_template(scope))
+        profiler = _start_profiler(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if profiler is not None:
+                    message.setdefault("headers", []).append(
+                        (b"x-profile-file", profiler.path.encode())
+                    )
+            elif message["type"] == "http.response.body":
+                response_bytes[0] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            route = _current_route.get()
+            _current_route.reset(route_token)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, scope["method"], route, str(status[0])
+            )
+            request_bytes = _header(scope, b"content-length")
+            if request_bytes:
+                PAYLOAD_BYTES.observe(int(request_bytes), route, "request")
+            PAYLOAD_BYTES.observe(response_bytes[0], route, "response")
+
+
+def _header(scope, name):
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode()
+    return None
+
+
+def _route_template(scope):
+    # Templates keep label cardinality bounded (no raw paths or query strings)
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class _RequestProfiler:
+    """Profiles the handling coroutine and writes the report to PROFILE_DIR"""
+
+    def __init__(self, scope):
+        os.makedirs(MetricsConfig.PROFILE_DIR, exist_ok=True)
+        name = scope["path"].strip("/").replace("/", "_") or "root"
+        extension = "html" if Profiler is not None else "prof"
+        self.path = os.path.join(
+            MetricsConfig.PROFILE_DIR, f"{name}-{time.time_ns()}.{extension}"
+        )
+        if Profiler is not None:
+            # Sampling profiler; follows the request across awaits
+            self._profiler = Profiler(async_mode="enabled")
+            self._profiler.start()
+        else:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        if Profiler is not None:
+            self._profiler.stop()
+            with open(self.path, "w") as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.path)
+        logger.info("Request profile written to %s", self.path)
+
+
+def _start_profiler(scope):
+    if not MetricsConfig.PROFILING_ENABLED or _header(scope, b"x-profile") != "1":
+        return None
+    return _RequestProfiler(scope)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per log line"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def configure_logging(level=MetricsConfig.LOG_LEVEL, fmt=MetricsConfig.LOG_FORMAT):
+    """
+    Set the root log level and format
+
+    Disabled levels cost one integer comparison per call as long as log
+    lines pass arguments lazily (`logger.debug("%s", value)`).
+    """
+    handler = logging.StreamHandler()
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
@@ -0,0 +1,63 @@
+# Importing required libraries
+import os
+import json
+import logging
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+
+# Model artifact Configuration
+class ModelStoreConfig:
+    # "r" maps the compiled forest tables (forest.save_tables) read-only from
+    # the page cache so every process shares one copy; empty string loads a
+    # private copy. sklearn copies its own tree arrays on unpickling, so a
+    # joblib artifact is private to each process either way.
+    MMAP_MODE = os.environ.get("AQUA_MODEL_MMAP_MODE", "r") or None
+
+
+def save_model(model, path):
+    """
+    Write the model as an uncompressed joblib artifact
+
+    Compressed artifacts cannot be memory-mapped.
+    """
+    joblib.dump(model, path, compress=0)
+    logger.info("Saved model to %s", path)
+
+
+def metadata_path(path):
+    """Sidecar JSON next to an artifact: water_quality_model.pkl -> water_quality_model.json"""
+    return os.path.splitext(path)[0] + ".json"
+
+
+def save_metadata(path, metadata):
+    """Write the training metadata of the artifact at `path`"""
+    with open(metadata_path(path), "w") as f:
+        json.dump(metadata, f, indent=2, default=str)
+
+
+def load_metadata(path):
+    """Training metadata of the artifact at `path`, or None for artifacts saved without it"""
+    try:
+        with open(metadata_path(path)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def model_version(path):
+    """Identifies an artifact on disk; changes whenever the file is rewritten"""
+    stat = os.stat(path)
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def load_model(path, mmap_mode=ModelStoreConfig.MMAP_MODE):
+    """
+    Load a joblib artifact, memory-mapping its plain NumPy arrays when `mmap_mode` is set
+
+    sklearn trees copy their node arrays into private buffers when unpickled,
+    so this saves no memory for a forest; serve `forest.load_forest` instead.
+    """
+    return joblib.load(path, mmap_mode=mmap_mode)
@@ -0,0 +1,112 @@
+# Importing required libraries
+import os
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Partition maintenance Configuration
+class PartitionConfig:
+    # Monthly partitions kept ready ahead of the current month
+    MONTHS_AHEAD = int(os.environ.get("AQUA_PARTITIONS_AHEAD", "3"))
+    # Months of history to keep; 0 keeps everything
+    RETENTION_MONTHS = int(os.environ.get("AQUA_RETENTION_MONTHS", "0"))
+    # Seconds between scheduled maintenance runs
+    INTERVAL = float(os.environ.get("AQUA_PARTITION_INTERVAL", "3600"))
+
+
+def maintain_partitions(
+    conn,
+    months_ahead=PartitionConfig.MONTHS_AHEAD,
+    retention_months=PartitionConfig.RETENTION_MONTHS,
+):
+    """
+    Create upcoming monthly partitions and drop expired ones
+
+    - Uses `create_prediction_partitions` / `drop_prediction_partitions`
+      from setup.sql (migrations/004_prediction_partition_functions.sql);
+      creating a month first moves its rows out of the default partition
+    - `retention_months=0` disables dropping
+    - Commits; returns the created and dropped partition names
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT create_prediction_partitions(%s)", (months_ahead,))
+        created = [row[0] for row in cur.fetchall()]
+
+        dropped = []
+        if retention_months > 0:
+            cur.execute("SELECT drop_prediction_partitions(%s)", (retention_months,))
+            dropped = [row[0] for row in cur.fetchall()]
+    conn.commit()
+
+    if created or dropped:
+        logger.info("Partitions created: %s, dropped: %s", created, dropped)
+    return {"created": created, "dropped": dropped}
+
+
+class PartitionMaintainer:
+    """
+    Run `maintain_partitions` in the background: at start, then every `interval` seconds
+
+    Keeps the upcoming months created however long the API runs. Each run
+    uses a pooled connection in the default executor; failures are logged
+    and retried on the next run.
+    """
+
+    def __init__(self, pool, interval=PartitionConfig.INTERVAL,
+                 months_ahead=PartitionConfig.MONTHS_AHEAD,
+                 retention_months=PartitionConfig.RETENTION_MONTHS):
+        self.pool = pool
+        self.interval = interval
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self._worker = None
+
+        # Metrics
+        self.runs_total = 0
+        self.failures_total = 0
+        self.created_total = 0
+        self.dropped_total = 0
+
+    async def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def run(self, months_ahead=None, retention_months=None):
+        months_ahead = self.months_ahead if months_ahead is None else months_ahead
+        retention_months = self.retention_months if retention_months is None else retention_months
+        with self.pool.connection() as conn:
+            result = maintain_partitions(conn, months_ahead, retention_months)
+        self.runs_total += 1
+        self.created_total += len(result["created"])
+        self.dropped_total += len(result["dropped"])
+        return result
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.run)
+            except Exception as e:
+                # E.g. the schema predates the maintenance functions (migration 004)
+                self.failures_total += 1
+                logger.error("Partition maintenance failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def stats(self):
+        return {
+            "interval_seconds": self.interval,
+            "runs_total": self.runs_total,
+            "failures_total": self.failures_total,
+            "created_total": self.created_total,
+            "dropped_total": self.dropped_total,
+        }
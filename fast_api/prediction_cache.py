@@ -0,0 +1,129 @@
+# Importing required libraries
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Prediction cache Configuration
+class PredictionCacheConfig:
+    # Entries kept (least recently used are evicted first); 0 disables the cache
+    MAX_SIZE = int(os.environ.get("AQUA_PREDICTION_CACHE_SIZE", "100000"))
+    # Seconds an entry stays valid
+    TTL = float(os.environ.get("AQUA_PREDICTION_CACHE_TTL", "3600"))
+
+
+def feature_keys(features, model_version):
+    """
+    One cache key per row: a hash of the encoded 22-feature vector and the model version
+
+    Rows are canonicalized to contiguous float64 with -0.0 folded into 0.0.
+    """
+    rows = np.ascontiguousarray(features, dtype=np.float64) + 0.0
+    prefix = model_version.encode()
+    return [
+        hashlib.blake2b(prefix + row.tobytes(), digest_size=16).digest()
+        for row in rows
+    ]
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU + TTL cache of predictions
+
+    - `predict` answers cached rows from memory and calls the model once for
+      the misses, preserving row order
+    - Each entry remembers what computing it cost, so hits add up to the
+      latency saved
+    """
+
+    def __init__(self, max_size=PredictionCacheConfig.MAX_SIZE, ttl=PredictionCacheConfig.TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.seconds_saved = 0.0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def get(self, key):
+        """Cached prediction for `key`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, cost = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.seconds_saved += cost
+            return value
+
+    def put(self, key, value, cost=0.0):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl, cost)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def predict(self, features, predict, model_version):
+        """Predictions for every row of `features`, computing only the uncached ones"""
+        if not self.enabled:
+            return predict(features)
+
+        keys = feature_keys(features, model_version)
+        cached = [self.get(key) for key in keys]
+        missing = [position for position, value in enumerate(cached) if value is None]
+        if not missing:
+            return np.asarray(cached)
+
+        started = time.perf_counter()
+        computed = predict(features[missing])
+        self.put_many([keys[position] for position in missing], computed,
+                      time.perf_counter() - started)
+
+        for position, value in zip(missing, computed):
+            cached[position] = value
+        return np.asarray(cached)
+
+    def put_many(self, keys, values, seconds):
+        """Store a batch computed in `seconds`; each entry carries an equal share"""
+        cost = seconds / len(keys) if keys else 0.0
+        for key, value in zip(keys, values):
+            self.put(key, value, cost)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "seconds_saved": self.seconds_saved,
+            }
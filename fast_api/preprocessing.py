@@ -0,0 +1,205 @@
+# Importing required libraries
+import os
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Shared by the API and the Streamlit app: every step works on whole columns,
+# never row by row
+
+logger = logging.getLogger(__name__)
+
+
+# CSV header -> API field name
+CSV_COLUMNS = {
+    "pH": "ph",
+    "Iron": "iron",
+    "Nitrate": "nitrate",
+    "Chloride": "chloride",
+    "Lead": "lead",
+    "Zinc": "zinc",
+    "Color": "color",
+    "Turbidity": "turbidity",
+    "Fluoride": "fluoride",
+    "Copper": "copper",
+    "Odor": "odor",
+    "Sulfate": "sulfate",
+    "Conductivity": "conductivity",
+    "Chlorine": "chlorine",
+    "Manganese": "manganese",
+    "Total Dissolved Solids": "tds",
+    "Source": "source",
+    "Water Temperature": "water_temp",
+    "Air Temperature": "air_temp",
+    "Month": "month",
+    "Day": "day",
+    "Time of Day": "time_of_day",
+    "Prediction": "prediction",
+}
+
+# Category order used by the LabelEncoders the model was trained with (sorted classes)
+CATEGORIES = {
+    "color": sorted(["Clear", "Brown", "Yellow", "Green"]),
+    "odor": sorted(["Odorless", "Foul", "Metallic"]),
+    "source": sorted(["River", "Lake", "Groundwater", "Well"]),
+    "time_of_day": sorted(["Morning", "Afternoon", "Evening", "Night"]),
+}
+
+# Values used for missing categoricals in uploaded CSVs
+CATEGORY_DEFAULTS = {
+    "color": "Clear",
+    "odor": "Odorless",
+    "source": "River",
+    "time_of_day": "Morning",
+}
+
+# Feature order the model was trained on
+FEATURE_ORDER = [
+    "ph", "iron", "nitrate", "chloride", "lead", "zinc", "color", "turbidity",
+    "fluoride", "copper", "odor", "sulfate", "conductivity", "chlorine",
+    "manganese", "tds", "source", "water_temp", "air_temp", "month", "day",
+    "time_of_day",
+]
+
+# Fields sent to /save_predictions/
+PAYLOAD_COLUMNS = FEATURE_ORDER + ["prediction"]
+
+
+def prepare_frame(raw):
+    """
+    Rename CSV headers to API field names and fill missing categoricals
+
+    Columns that are not model inputs are dropped.
+    """
+    frame = raw.rename(columns=CSV_COLUMNS)
+    missing = [name for name in FEATURE_ORDER if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {missing}")
+
+    frame = frame[[name for name in PAYLOAD_COLUMNS if name in frame.columns]]
+    return frame.fillna(CATEGORY_DEFAULTS)
+
+
+class CategoryEncoder:
+    """
+    Persisted category -> integer code maps for the categorical features
+
+    - A value's code is its position in the sorted category list (the order
+      the original LabelEncoders used)
+    - Encoding is one hash lookup pass per column (`pd.Index.get_indexer`)
+    - Unknown values (and nulls) are explicit: `unknown="error"` raises
+      ValueError naming them, `unknown="default"` encodes them as the
+      column's CATEGORY_DEFAULTS value and counts them per column
+    - Saved as JSON next to the model by training and loaded by every
+      serving path, so both sides always agree on the codes
+    """
+
+    def __init__(self, categories=CATEGORIES, defaults=CATEGORY_DEFAULTS):
+        self.categories = {name: sorted(values) for name, values in categories.items()}
+        self.defaults = {name: defaults[name] for name in self.categories if name in defaults}
+        self._indexes = {name: pd.Index(values) for name, values in self.categories.items()}
+
+    @classmethod
+    def fit(cls, frame, base=CATEGORIES, defaults=CATEGORY_DEFAULTS):
+        """Categories of `base` plus every text value seen in `frame`"""
+        categories = {}
+        for name, values in base.items():
+            text = name in frame and not pd.api.types.is_numeric_dtype(frame[name])
+            observed = frame[name].dropna().unique() if text else []
+            categories[name] = set(values) | {str(value) for value in observed}
+        return cls(categories, defaults)
+
+    def to_dict(self):
+        return {"categories": self.categories, "defaults": self.defaults}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["categories"], data.get("defaults", CATEGORY_DEFAULTS))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def codes(self, name, column, unknown="error", unknown_counts=None):
+        """Integer codes of one categorical column"""
+        codes = self._indexes[name].get_indexer(column)
+        missing = codes == -1
+        if missing.any():
+            if unknown != "default" or name not in self.defaults:
+                bad = sorted(pd.Series(column)[missing].astype(str).unique())
+                raise ValueError(f"Unknown {name} value(s): {bad}")
+            codes[missing] = self._indexes[name].get_loc(self.defaults[name])
+            if unknown_counts is not None:
+                unknown_counts[name] = unknown_counts.get(name, 0) + int(missing.sum())
+        return codes
+
+    def encode(self, frame, unknown="error", unknown_counts=None):
+        """
+        Turn a frame with API field names into the (n, 22) float matrix the model expects
+
+        `unknown_counts`, when given, collects per-column counts of values
+        replaced under `unknown="default"`.
+        """
+        features = np.empty((len(frame), len(FEATURE_ORDER)), dtype=np.float64)
+        for position, name in enumerate(FEATURE_ORDER):
+            column = frame[name]
+            if name in self.categories:
+                features[:, position] = self.codes(name, column, unknown, unknown_counts)
+            else:
+                features[:, position] = column.to_numpy(dtype=np.float64)
+        return features
+
+
+# Encoder matching the built-in category lists (models trained before the encoder artifact)
+DEFAULT_ENCODER = CategoryEncoder()
+
+
+def encoder_path(model_path):
+    """Encoder artifact next to a model: water_quality_model.pkl -> water_quality_model.encoder.json"""
+    return os.path.splitext(model_path)[0] + ".encoder.json"
+
+
+def load_encoder(model_path):
+    """The encoder saved with the model at `model_path`, or DEFAULT_ENCODER for older models"""
+    path = encoder_path(model_path)
+    if not os.path.exists(path):
+        logger.warning("No encoder artifact at %s; using the built-in categories", path)
+        return DEFAULT_ENCODER
+    return CategoryEncoder.load(path)
+
+
+def encode_frame(frame, encoder=None, unknown="error", unknown_counts=None):
+    """
+    Encode a frame with API field names (see `CategoryEncoder.encode`)
+
+    Raises ValueError on an unknown categorical value unless `unknown="default"`.
+    """
+    return (encoder or DEFAULT_ENCODER).encode(frame, unknown, unknown_counts)
+
+
+def encode_features(records, encoder=None, unknown="error"):
+    """Same as `encode_frame` for a list of input dicts"""
+    return encode_frame(pd.DataFrame.from_records(records, columns=FEATURE_ORDER), encoder, unknown)
+
+
+def to_payload(frame, predictions=None):
+    """Rows for /save_predictions/ as a list of plain dicts"""
+    return _payload_frame(frame, predictions).to_dict("records")
+
+
+def to_payload_json(frame, predictions=None):
+    """Rows for /save_predictions/ serialized straight to a JSON array (bytes)"""
+    return _payload_frame(frame, predictions).to_json(orient="records").encode()
+
+
+def _payload_frame(frame, predictions):
+    if predictions is not None:
+        frame = frame.assign(prediction=np.asarray(predictions))
+    return frame[PAYLOAD_COLUMNS]
@@ -0,0 +1,275 @@
+# Importing required libraries
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from bulk_ingest import PREDICTION_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+# Rollup Configuration
+class RollupConfig:
+    # Seconds between scheduled refreshes
+    INTERVAL = float(os.environ.get("AQUA_ROLLUP_INTERVAL", "300"))
+    # Seconds to wait after an ingest before refreshing (coalesces bursts of saves)
+    INGEST_DELAY = float(os.environ.get("AQUA_ROLLUP_INGEST_DELAY", "5"))
+    # Seconds between rebuilds of the current day's daily buckets; a day is
+    # also rebuilt as soon as it closes
+    DAILY_INTERVAL = float(os.environ.get("AQUA_ROLLUP_DAILY_INTERVAL", "3600"))
+    # Seconds a row may commit after its `timestamp` (CURRENT_TIMESTAMP is the
+    # transaction start): at least the longest ingest transaction
+    LAG = float(os.environ.get("AQUA_ROLLUP_LAG", "900"))
+
+
+GRANULARITIES = ("hour", "day")
+
+# State column holding each granularity's watermark
+WATERMARK_COLUMNS = {"hour": "watermark", "day": "day_watermark"}
+
+# Chemical and temperature readings summarized per bucket
+METRIC_COLUMNS = tuple(
+    name for name in PREDICTION_COLUMNS
+    if name not in ("color", "odor", "source", "time_of_day", "month", "day", "prediction")
+)
+
+_METRIC_VALUES = ", ".join(f"('{name}', p.{name})" for name in METRIC_COLUMNS)
+
+METRIC_ROLLUP_QUERY = f"""
+    INSERT INTO prediction_rollups
+        (granularity, bucket, source, time_of_day, metric, row_count, mean, p50, p95, min, max)
+    SELECT granularity, bucket, source, time_of_day, metric, row_count, mean,
+           quantiles[1], quantiles[2], min, max
+    FROM (
+        SELECT %(granularity)s AS granularity,
+               date_trunc(%(granularity)s, p.timestamp) AS bucket,
+               p.source, p.time_of_day, m.metric,
+               count(m.value) AS row_count,
+               avg(m.value) AS mean,
+               percentile_cont(ARRAY[0.5, 0.95]) WITHIN GROUP (ORDER BY m.value) AS quantiles,
+               min(m.value) AS min,
+               max(m.value) AS max
+        FROM predictions p
+        CROSS JOIN LATERAL (VALUES {_METRIC_VALUES}) AS m(metric, value)
+        WHERE p.timestamp >= %(since)s
+        GROUP BY 2, 3, 4, 5
+    ) AS grouped
+"""
+
+CLASS_ROLLUP_QUERY = """
+    INSERT INTO prediction_class_rollups
+        (granularity, bucket, source, time_of_day, prediction, row_count)
+    SELECT %(granularity)s, date_trunc(%(granularity)s, timestamp), source, time_of_day,
+           prediction, count(*)
+    FROM predictions
+    WHERE timestamp >= %(since)s
+    GROUP BY 2, 3, 4, 5
+"""
+
+
+def refresh_rollups(conn, full=False, daily=None, lag=RollupConfig.LAG):
+    """
+    Recompute the rollup buckets touched since the last refresh
+
+    - Each granularity has a watermark: the newest `timestamp` its previous
+      refresh saw. Buckets are rebuilt from `rebuild_start`: the hour (or
+      day) of the watermark minus `lag`, so a refresh costs the rows of the
+      last hour or so plus `lag`, and rows that commit late still land
+    - Daily buckets are rebuilt when `daily` is True, or (`daily=None`)
+      once the watermark's day has closed
+    - `full=True` rebuilds everything
+    - The state row is locked, so concurrent refreshes queue instead of racing
+    - Commits; returns the start of the rebuilt range per granularity
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT watermark, day_watermark FROM prediction_rollup_state WHERE id = 1 FOR UPDATE"
+        )
+        row = cur.fetchone() or (None, None)
+        watermarks = {"hour": row[0], "day": row[1]}
+
+        cur.execute("SELECT max(timestamp) FROM predictions")
+        newest = cur.fetchone()[0]
+        if newest is None:
+            conn.rollback()
+            return {"since": {}, "watermark": None}
+
+        if daily is None:
+            day_watermark = watermarks["day"]
+            daily = day_watermark is None or day_watermark.date() < newest.date()
+        granularities = GRANULARITIES if full or daily else ("hour",)
+
+        rebuilt = {}
+        for granularity in granularities:
+            watermark = None if full else watermarks[granularity]
+            since = rebuild_start(granularity, watermark, lag) if watermark else datetime.min
+            for table in ("prediction_rollups", "prediction_class_rollups"):
+                cur.execute(
+                    f"DELETE FROM {table} WHERE granularity = %s AND bucket >= %s",
+                    (granularity, since),
+                )
+            params = {"granularity": granularity, "since": since}
+            cur.execute(METRIC_ROLLUP_QUERY, params)
+            cur.execute(CLASS_ROLLUP_QUERY, params)
+            rebuilt[granularity] = since if watermark else None
+
+        columns = [WATERMARK_COLUMNS[granularity] for granularity in granularities]
+        cur.execute(
+            f"""
+            INSERT INTO prediction_rollup_state (id, {", ".join(columns)}, refreshed_at)
+            VALUES (1, {", ".join(["%s"] * len(columns))}, now())
+            ON CONFLICT (id) DO UPDATE
+            SET {", ".join(f"{column} = EXCLUDED.{column}" for column in columns)},
+                refreshed_at = EXCLUDED.refreshed_at
+            """,
+            [newest] * len(columns),
+        )
+    conn.commit()
+
+    logger.info("Rollups rebuilt from %s (watermark %s)", rebuilt, newest)
+    return {"since": rebuilt, "watermark": newest}
+
+
+def rebuild_start(granularity, watermark, lag=RollupConfig.LAG):
+    """
+    First bucket a refresh must rebuild, given the previous refresh's watermark
+
+    A row's `timestamp` is its transaction's start, so a group commit or a
+    long COPY can commit rows older than the watermark after that refresh
+    ran. Such a row committed at most `lag` seconds after its timestamp, and
+    the watermark is no later than the previous refresh, which ran before the
+    commit; so timestamp >= commit - lag >= watermark - lag, and the bucket
+    of `watermark - lag` is early enough.
+    """
+    return _bucket_start(granularity, watermark - timedelta(seconds=lag))
+
+
+def _bucket_start(granularity, timestamp):
+    # Python's date_trunc for the two granularities
+    start = timestamp.replace(minute=0, second=0, microsecond=0)
+    return start.replace(hour=0) if granularity == "day" else start
+
+
+def build_stats_queries(granularity, start_date=None, end_date=None,
+                        source=None, time_of_day=None, metric=None):
+    """(class query, metric query) with a shared parameter list, oldest bucket first"""
+    conditions = ["granularity = %s"]
+    params = [granularity]
+    if start_date:
+        conditions.append("bucket >= %s")
+        params.append(start_date)
+    if end_date:
+        conditions.append("bucket < %s")
+        params.append(end_date + timedelta(days=1))
+    if source:
+        conditions.append("source = %s")
+        params.append(source)
+    if time_of_day:
+        conditions.append("time_of_day = %s")
+        params.append(time_of_day)
+    where = " WHERE " + " AND ".join(conditions)
+
+    class_query = (
+        "SELECT bucket, source, time_of_day, prediction, row_count "
+        "FROM prediction_class_rollups" + where +
+        " ORDER BY bucket, source, time_of_day, prediction"
+    )
+    metric_query = (
+        "SELECT bucket, source, time_of_day, metric, row_count, mean, p50, p95, min, max "
+        "FROM prediction_rollups" + where
+    )
+    metric_params = list(params)
+    if metric:
+        metric_query += " AND metric = %s"
+        metric_params.append(metric)
+    metric_query += " ORDER BY bucket, source, time_of_day, metric"
+    return (class_query, params), (metric_query, metric_params)
+
+
+class RollupRefresher:
+    """
+    Keep rollups current in the background
+
+    - Refreshes every `interval` seconds
+    - `notify` (called after an ingest) brings the next refresh forward to
+      `ingest_delay` seconds, so a burst of saves costs one refresh
+    - Most refreshes rebuild only the hourly buckets since the watermark;
+      the daily buckets of the current day every `daily_interval` seconds
+      (and whenever a day closes)
+    - The refresh runs in the default executor on a pooled connection
+    """
+
+    def __init__(self, pool, interval=RollupConfig.INTERVAL, ingest_delay=RollupConfig.INGEST_DELAY,
+                 daily_interval=RollupConfig.DAILY_INTERVAL):
+        self.pool = pool
+        self.interval = interval
+        self.ingest_delay = ingest_delay
+        self.daily_interval = daily_interval
+        self._last_daily = None
+        self._loop = None
+        self._wakeup = None
+        self._worker = None
+
+        # Metrics
+        self.refreshes_total = 0
+        self.daily_refreshes_total = 0
+        self.failures_total = 0
+        self.last_watermark = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def notify(self):
+        # Thread-safe: sync endpoints run in the threadpool
+        if self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def refresh(self, full=False):
+        now = time.monotonic()
+        # None: only when a day has closed
+        daily = True if self._last_daily is None or now - self._last_daily >= self.daily_interval else None
+        with self.pool.connection() as conn:
+            result = refresh_rollups(conn, full, daily)
+        self.refreshes_total += 1
+        self.last_watermark = result["watermark"]
+        if "day" in result["since"]:
+            self._last_daily = now
+            self.daily_refreshes_total += 1
+        return result
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+                await asyncio.sleep(self.ingest_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await loop.run_in_executor(None, self.refresh)
+            except Exception as e:
+                self.failures_total += 1
+                logger.error("Rollup refresh failed: %s", e)
+
+    def stats(self):
+        return {
+            "interval_seconds": self.interval,
+            "refreshes_total": self.refreshes_total,
+            "daily_refreshes_total": self.daily_refreshes_total,
+            "failures_total": self.failures_total,
+            "last_watermark": self.last_watermark,
+        }
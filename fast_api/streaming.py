@@ -0,0 +1,213 @@
+# Importing required libraries
+import os
+import json
+import base64
+import logging
+from datetime import datetime, timedelta
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow/Parquet export is optional
+    pa = None
+    pq = None
+
+from bulk_ingest import PREDICTION_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+# Rows fetched from the server-side cursor per round-trip
+STREAM_BATCH_SIZE = int(os.environ.get("AQUA_STREAM_BATCH_SIZE", "5000"))
+
+# Explicit column list (stable order for every export format)
+SELECT_COLUMNS = ("id",) + PREDICTION_COLUMNS + ("timestamp",)
+
+STRING_COLUMNS = {"color", "odor", "source", "time_of_day"}
+INTEGER_COLUMNS = {"month", "day", "prediction"}
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def arrow_schema(columns=SELECT_COLUMNS):
+    fields = []
+    for name in columns:
+        if name == "id":
+            fields.append(pa.field(name, pa.int64()))
+        elif name == "timestamp":
+            fields.append(pa.field(name, pa.timestamp("us")))
+        elif name in STRING_COLUMNS:
+            fields.append(pa.field(name, pa.string()))
+        elif name in INTEGER_COLUMNS:
+            fields.append(pa.field(name, pa.int32()))
+        else:
+            fields.append(pa.field(name, pa.float64()))
+    return pa.schema(fields)
+
+
+# Keyset cursor: opaque token for the (timestamp, id) of the last row returned
+def encode_cursor(timestamp, row_id):
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(token):
+    """Returns (timestamp, id); raises ValueError on a malformed token"""
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(token.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+
+def build_query(start_date=None, end_date=None, after=None, limit=None, table="predictions"):
+    """
+    Newest-first query over `predictions` using keyset pagination
+
+    Served by the (timestamp DESC, id DESC) index; date filters prune partitions.
+
+    - `end_date` is inclusive (the whole day is returned)
+    - `after` is a decoded cursor; only rows strictly older are returned
+    """
+    conditions = []
+    params = []
+    if start_date:
+        conditions.append("timestamp >= %s")
+        params.append(start_date)
+    if end_date:
+        conditions.append("timestamp < %s")
+        params.append(end_date + timedelta(days=1))
+    if after:
+        conditions.append("(timestamp, id) < (%s, %s)")
+        params.extend(after)
+
+    query = f"SELECT {', '.join(SELECT_COLUMNS)} FROM {table}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY timestamp DESC, id DESC"
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+
+def fetch_batches(conn, query, params, batch_size=STREAM_BATCH_SIZE):
+    # Named (server-side) cursor so only one batch is held in memory at a time
+    with conn.cursor(name="predictions_export") as cur:
+        cur.itersize = batch_size
+        cur.execute(query, params)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def ndjson_chunks(batches):
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(SELECT_COLUMNS, row)), default=_json_default) + "\n"
+            for row in rows
+        ).encode()
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _record_batch(rows, schema):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def arrow_chunks(batches):
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for rows in batches:
+            writer.write_batch(_record_batch(rows, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def parquet_chunks(batches):
+    # One row group per fetched batch
+    schema = arrow_schema()
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for rows in batches:
+            writer.write_batch(_record_batch(rows, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "ndjson": ndjson_chunks,
+    "arrow": arrow_chunks,
+    "parquet": parquet_chunks,
+}
+
+
+def stream_predictions(conn, release, query, params, fmt):
+    """
+    Generator of encoded chunks for a StreamingResponse
+
+    `release` is called exactly once when the stream finishes, fails, or is
+    abandoned by the client. The first chunk is an empty bytes object so the
+    caller can prime the generator (and surface query errors) before the
+    response starts.
+    """
+    try:
+        batches = fetch_batches(conn, query, params)
+        first = next(batches, None)
+        yield b""
+        if first is None:
+            batches = iter(())
+        else:
+            batches = _prepend(first, batches)
+        yield from ENCODERS[fmt](batches)
+    finally:
+        release(conn)
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
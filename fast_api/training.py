@@ -0,0 +1,306 @@
+# Model training: hyperparameter search under a latency and size budget
+#
+# Successive halving trains every sampled configuration on a small slice of
+# the data and only promotes the best third to more rows, so weak candidates
+# stop early. The top configurations are then refit on the whole training
+# split and benchmarked the way they will be served (compiled forest, one row
+# per call). The most accurate one within the budgets is written with its
+# category encoder, the drift baseline (training-data distributions the API
+# compares incoming rows against) and a metadata sidecar (feature order,
+# encoder classes, metrics, benchmarks).
+#
+# Usage (from the repository root):
+#   python fast_api/training.py --data data/cleaned --output water_quality_model.pkl
+#   python fast_api/training.py --data cleaned_data.csv   # a single cleaned CSV
+#   python fast_api/training.py --latency-budget-ms 2 --size-budget-mb 50 --candidates 96
+import os
+import io
+import sys
+import time
+import logging
+import argparse
+import platform
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score
+from sklearn.model_selection import HalvingRandomSearchCV, train_test_split
+
+from data_prep import TARGET, DataPrepConfig, read_dataset
+from drift import baseline_path, build_baseline, save_baseline
+from forest import CompiledForest, compile_forest, save_tables
+from model_store import save_metadata, save_model
+from preprocessing import CATEGORY_DEFAULTS, CSV_COLUMNS, FEATURE_ORDER, CategoryEncoder, encoder_path
+
+logger = logging.getLogger(__name__)
+
+
+# Training Configuration
+class TrainingConfig:
+    # Cleaned Parquet partitions (fast_api/data_prep.py) or a cleaned CSV
+    DATA_PATH = os.environ.get("AQUA_TRAINING_DATA", DataPrepConfig.CLEAN_DIR)
+    MODEL_PATH = os.environ.get("AQUA_MODEL_PATH", "water_quality_model.pkl")
+    # Cores for the search (candidates run in parallel) and the final refits
+    N_JOBS = int(os.environ.get("AQUA_N_JOBS", "-1"))
+    # Configurations sampled for successive halving
+    N_CANDIDATES = int(os.environ.get("AQUA_TRAIN_CANDIDATES", "48"))
+    # Best configurations refit on the full training split and benchmarked
+    TOP_K = int(os.environ.get("AQUA_TRAIN_TOP_K", "5"))
+    # Budgets the chosen model must meet: single-row p99 latency and artifact size
+    LATENCY_BUDGET_MS = float(os.environ.get("AQUA_TRAIN_LATENCY_BUDGET_MS", "5"))
+    SIZE_BUDGET_MB = float(os.environ.get("AQUA_TRAIN_SIZE_BUDGET_MB", "100"))
+    SEED = int(os.environ.get("AQUA_TRAIN_SEED", "21"))
+
+
+SEARCH_SPACE = {
+    "n_estimators": [25, 50, 100, 200, 400],
+    "max_depth": [8, 12, 16, 24, None],
+    "min_samples_leaf": [1, 2, 5, 10, 25],
+    "max_features": ["sqrt", 0.5],
+}
+
+
+def load_training_data(path):
+    """
+    Feature matrix, target, feature names and category encoder
+
+    - A directory is read as the cleaned Parquet dataset, loading only the
+      model's features and the target
+    - A CSV has its headers renamed to API field names; the features are
+      taken in FEATURE_ORDER and the last column is the target
+    - Categoricals must be text: they are encoded with an encoder fit on this
+      data (the built-in categories plus any new value). Numeric codes are
+      refused, since the classes they stand for are unknown
+    - Missing categoricals get CATEGORY_DEFAULTS, as uploaded CSVs do at serving time
+    """
+    if os.path.isdir(path):
+        frame = read_dataset(path)
+        target = frame[TARGET]
+    else:
+        frame = pd.read_csv(path).rename(columns=CSV_COLUMNS)
+        target = frame.iloc[:, -1]
+    missing = [name for name in FEATURE_ORDER if name not in frame]
+    if missing:
+        raise ValueError(f"{path}: missing column(s): {missing}")
+    features = frame[FEATURE_ORDER].copy()
+    # An all-missing column reads as float; it has no codes, only gaps to fill
+    coded = [name for name in CATEGORY_DEFAULTS
+             if pd.api.types.is_numeric_dtype(features[name]) and features[name].notna().any()]
+    if coded:
+        raise ValueError(f"{path}: numeric codes in categorical column(s) {coded}; "
+                         "train on the text values (fast_api/data_prep.py output)")
+    gaps = {name: int(count) for name, count in features[list(CATEGORY_DEFAULTS)].isna().sum().items() if count}
+    if gaps:
+        logger.warning("%s: filling missing categoricals with their defaults: %s", path, gaps)
+        features = features.fillna(CATEGORY_DEFAULTS)
+    encoder = CategoryEncoder.fit(features)
+    for name in encoder.categories:
+        features[name] = encoder.codes(name, features[name])
+    return features.to_numpy(dtype=np.float64), target.to_numpy(), list(FEATURE_ORDER), encoder
+
+
+def search(X, y, n_candidates=TrainingConfig.N_CANDIDATES, n_jobs=TrainingConfig.N_JOBS,
+           seed=TrainingConfig.SEED):
+    """
+    Successive-halving random search over SEARCH_SPACE
+
+    Candidates run in parallel, each forest on one core. Returns the fitted
+    HalvingRandomSearchCV.
+    """
+    searcher = HalvingRandomSearchCV(
+        RandomForestClassifier(n_jobs=1, random_state=seed),
+        SEARCH_SPACE,
+        n_candidates=n_candidates,
+        factor=3,
+        resource="n_samples",
+        scoring="accuracy",
+        cv=3,
+        refit=False,
+        n_jobs=n_jobs,
+        random_state=seed,
+    )
+    started = time.perf_counter()
+    searcher.fit(X, y)
+    logger.info("Search over %d candidates took %.1fs (%d rounds)",
+                n_candidates, time.perf_counter() - started, searcher.n_iterations_)
+    return searcher
+
+
+def top_candidates(searcher, k=TrainingConfig.TOP_K):
+    """Parameters of the `k` best configurations of the last halving round"""
+    results = pd.DataFrame(searcher.cv_results_)
+    last_round = results[results["iter"] == results["iter"].max()]
+    best = last_round.sort_values("mean_test_score", ascending=False).head(k)
+    return [(params, float(score)) for params, score in zip(best["params"], best["mean_test_score"])]
+
+
+def artifact_bytes(model):
+    """Size of the uncompressed joblib artifact `save_model` would write"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer, compress=0)
+    return buffer.tell()
+
+
+def benchmark_latency(predictor, X, calls=500):
+    """Single-row p50/p99 (ms) and batch rows per second for `predictor.predict`"""
+    samples = np.empty(calls)
+    for i in range(calls):
+        row = X[i % len(X)][np.newaxis, :]
+        started = time.perf_counter()
+        predictor.predict(row)
+        samples[i] = time.perf_counter() - started
+    p50, p99 = np.percentile(samples, [50, 99]) * 1000
+
+    started = time.perf_counter()
+    predictor.predict(X)
+    return {
+        "single_p50_ms": float(p50),
+        "single_p99_ms": float(p99),
+        "batch_rows_per_sec": len(X) / (time.perf_counter() - started),
+    }
+
+
+def evaluate(params, X_train, y_train, X_test, y_test, n_jobs=TrainingConfig.N_JOBS,
+             seed=TrainingConfig.SEED):
+    """Refit one configuration on the training split; returns (model, report)"""
+    model = RandomForestClassifier(n_jobs=n_jobs, random_state=seed, **params)
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    # Evaluated and benchmarked as served: one thread, compiled when enabled
+    model.n_jobs = 1
+    y_pred = model.predict(X_test)
+    report = {
+        "params": params,
+        "fit_seconds": fit_seconds,
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, average="weighted", zero_division=0),
+        "recall": recall_score(y_test, y_pred, average="weighted", zero_division=0),
+        "f1": f1_score(y_test, y_pred, average="weighted", zero_division=0),
+        "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
+        "artifact_mb": artifact_bytes(model) / 2**20,
+        "nodes": sum(tree.tree_.node_count for tree in model.estimators_),
+        **benchmark_latency(compile_forest(model), X_test),
+    }
+    return model, report
+
+
+def select_model(reports, latency_budget_ms=TrainingConfig.LATENCY_BUDGET_MS,
+                 size_budget_mb=TrainingConfig.SIZE_BUDGET_MB):
+    """
+    Index of the most accurate report within both budgets
+
+    Ties go to the faster model. Raises ValueError when nothing fits.
+    """
+    within = [
+        i for i, report in enumerate(reports)
+        if report["single_p99_ms"] <= latency_budget_ms and report["artifact_mb"] <= size_budget_mb
+    ]
+    if not within:
+        raise ValueError(
+            f"No candidate meets the budget (p99 <= {latency_budget_ms} ms, "
+            f"artifact <= {size_budget_mb} MB)"
+        )
+    return max(within, key=lambda i: (reports[i]["accuracy"], -reports[i]["single_p99_ms"]))
+
+
+def train(data_path=TrainingConfig.DATA_PATH, model_path=TrainingConfig.MODEL_PATH,
+          n_candidates=TrainingConfig.N_CANDIDATES, top_k=TrainingConfig.TOP_K,
+          latency_budget_ms=TrainingConfig.LATENCY_BUDGET_MS,
+          size_budget_mb=TrainingConfig.SIZE_BUDGET_MB,
+          n_jobs=TrainingConfig.N_JOBS, seed=TrainingConfig.SEED):
+    """
+    Search, benchmark, select and save; returns the metadata written next to the model
+    """
+    X, y, feature_names, encoder = load_training_data(data_path)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+
+    searcher = search(X_train, y_train, n_candidates, n_jobs, seed)
+    models, reports = [], []
+    for params, cv_score in top_candidates(searcher, top_k):
+        model, report = evaluate(params, X_train, y_train, X_test, y_test, n_jobs, seed)
+        report["cv_accuracy"] = cv_score
+        models.append(model)
+        reports.append(report)
+        logger.info(
+            "%s: accuracy %.4f, p99 %.3f ms, %.1f MB",
+            params, report["accuracy"], report["single_p99_ms"], report["artifact_mb"],
+        )
+
+    chosen = select_model(reports, latency_budget_ms, size_budget_mb)
+    model = models[chosen]
+    # Serving sets its own n_jobs; keep the artifact neutral
+    model.n_jobs = None
+    save_model(model, model_path)
+    # Serving memory-maps these instead of unpickling and compiling per process
+    save_tables(CompiledForest(model), model_path)
+    # Serving loads this same encoder next to the model
+    encoder.save(encoder_path(model_path))
+    # Expected feature distributions and held-out prediction mix for drift scores
+    baseline = build_baseline(dict(zip(feature_names, X_train.T)), encoder.categories,
+                              model.predict(X_test), model.classes_)
+    save_baseline(baseline_path(model_path), baseline)
+
+    metadata = {
+        "trained_at": datetime.now().isoformat(),
+        "data_path": os.path.abspath(data_path),
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "feature_order": feature_names,
+        "categories": encoder.categories,
+        "encoder_path": encoder_path(model_path),
+        "baseline_path": baseline_path(model_path),
+        "classes": model.classes_.tolist(),
+        "budget": {"latency_p99_ms": latency_budget_ms, "artifact_mb": size_budget_mb},
+        "chosen": reports[chosen],
+        "candidates": reports,
+        "search": {"candidates": n_candidates, "rounds": int(searcher.n_iterations_),
+                   "space": SEARCH_SPACE},
+        "versions": {"python": platform.python_version(), "sklearn": sklearn.__version__,
+                     "numpy": np.__version__},
+    }
+    save_metadata(model_path, metadata)
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the water quality model under a latency/size budget")
+    parser.add_argument("--data", default=TrainingConfig.DATA_PATH,
+                        help="cleaned Parquet dataset directory, or a CSV whose last column is the target")
+    parser.add_argument("--output", default=TrainingConfig.MODEL_PATH, help="model artifact to write")
+    parser.add_argument("--candidates", type=int, default=TrainingConfig.N_CANDIDATES)
+    parser.add_argument("--top-k", type=int, default=TrainingConfig.TOP_K)
+    parser.add_argument("--latency-budget-ms", type=float, default=TrainingConfig.LATENCY_BUDGET_MS)
+    parser.add_argument("--size-budget-mb", type=float, default=TrainingConfig.SIZE_BUDGET_MB)
+    parser.add_argument("--n-jobs", type=int, default=TrainingConfig.N_JOBS)
+    parser.add_argument("--seed", type=int, default=TrainingConfig.SEED)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        metadata = train(args.data, args.output, args.candidates, args.top_k,
+                         args.latency_budget_ms, args.size_budget_mb, args.n_jobs, args.seed)
+    except ValueError as e:
+        logger.error("%s", e)
+        sys.exit(1)
+
+    chosen = metadata["chosen"]
+    print(f"Chosen: {chosen['params']}")
+    print(f"Accuracy: {chosen['accuracy']:.2f}")
+    print(f"Precision: {chosen['precision']:.2f}")
+    print(f"Recall: {chosen['recall']:.2f}")
+    print(f"F1-Score: {chosen['f1']:.2f}")
+    print("Confusion Matrix:")
+    print(np.array(chosen["confusion_matrix"]))
+    print(f"Single-row p50 {chosen['single_p50_ms']:.3f} ms, p99 {chosen['single_p99_ms']:.3f} ms; "
+          f"batch {chosen['batch_rows_per_sec']:,.0f} rows/s; artifact {chosen['artifact_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
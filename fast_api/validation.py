@@ -0,0 +1,206 @@
+# Importing required libraries
+import os
+import time
+import logging
+import threading
+from itertools import compress
+
+import numpy as np
+import pandas as pd
+
+from bulk_ingest import PREDICTION_COLUMNS
+from preprocessing import CATEGORIES, FEATURE_ORDER
+
+logger = logging.getLogger(__name__)
+
+
+# Data-quality validation Configuration
+class ValidationConfig:
+    # "0" accepts every row that parses (no range or domain checks)
+    ENABLED = os.environ.get("AQUA_VALIDATION", "1") == "1"
+
+
+# Inclusive physical bounds per numeric field; None leaves that side open.
+# Temperatures are wide enough for readings in °C or °F.
+RANGES = {
+    "ph": (0, 14),
+    "iron": (0, None),
+    "nitrate": (0, None),
+    "chloride": (0, None),
+    "lead": (0, None),
+    "zinc": (0, None),
+    "turbidity": (0, None),
+    "fluoride": (0, None),
+    "copper": (0, None),
+    "sulfate": (0, None),
+    "conductivity": (0, None),
+    "chlorine": (0, None),
+    "manganese": (0, None),
+    "tds": (0, None),
+    "water_temp": (-10, 110),
+    "air_temp": (-100, 150),
+    "month": (1, 12),
+    "day": (1, 31),
+    "prediction": (0, None),
+}
+
+
+class ValidationResult:
+    """
+    Outcome of validating one batch
+
+    - `good`: boolean mask of rows that passed every rule
+    - `violations`: per-row bitmask of failed rules (bit i = `rules[i]`)
+    - `counts`: rule name -> rows failing it (only rules that fired)
+    """
+
+    def __init__(self, good, violations, counts, rules):
+        self.good = good
+        self.violations = violations
+        self.counts = counts
+        self.rules = rules
+
+    @property
+    def bad_count(self):
+        return int(len(self.good) - self.good.sum())
+
+    def reasons(self):
+        """Failed rule names of every bad row, e.g. "ph_range;lead_range" """
+        bad = self.violations[~self.good]
+        reasons = [[] for _ in range(len(bad))]
+        for bit, name in enumerate(self.rules):
+            if name in self.counts:
+                for row in np.flatnonzero(bad & (1 << bit)):
+                    reasons[row].append(name)
+        return [";".join(names) for names in reasons]
+
+
+class RowValidator:
+    """
+    Vectorized data-quality checks: schema, missing values, ranges, categorical domains
+
+    - `validate` takes any mapping of column name -> array-like (a DataFrame,
+      a dict of NumPy arrays, ...) and runs each rule over a whole column
+    - Missing required columns fail the whole batch (ValueError); every other
+      rule flags individual rows
+    - Categorical domains are the categories of the model's encoder
+      (`encoder.categories`); the built-in CATEGORIES only for older models
+    - Cumulative per-rule counts are kept for metrics (`stats`)
+    """
+
+    def __init__(self, ranges=RANGES, categories=CATEGORIES):
+        self.ranges = ranges
+        self._lock = threading.Lock()
+        self.rows_checked = 0
+        self.rows_rejected = 0
+        self.seconds = 0.0
+        self.violation_totals = {}
+        self.set_categories(categories)
+
+    def set_categories(self, categories):
+        """Replace the domain rules, e.g. with the categories of a newly loaded encoder"""
+        # (name, column, kind, argument); at most 63 rules fit the bitmask
+        rules = []
+        for column, bounds in self.ranges.items():
+            rules.append((f"{column}_missing", column, "missing", None))
+            rules.append((f"{column}_range", column, "range", bounds))
+        for column, values in categories.items():
+            rules.append((f"{column}_domain", column, "domain", pd.Index(values)))
+        with self._lock:
+            # One assignment: a concurrent `validate` sees the old or the new rules
+            self._rules = (rules, [rule[0] for rule in rules])
+            for name, _, _, _ in rules:
+                self.violation_totals.setdefault(name, 0)
+
+    @property
+    def rules(self):
+        return self._rules[0]
+
+    @property
+    def rule_names(self):
+        return self._rules[1]
+
+    def validate(self, columns, required=FEATURE_ORDER):
+        started = time.perf_counter()
+        rules, rule_names = self._rules
+        missing = [name for name in required if name not in columns]
+        if missing:
+            raise ValueError(f"Missing column(s): {missing}")
+
+        n_rows = len(columns[required[0]]) if required else 0
+        violations = np.zeros(n_rows, dtype=np.int64)
+        counts = {}
+        numeric = {}
+        for bit, (name, column, kind, argument) in enumerate(rules):
+            if column not in columns:
+                continue
+            if kind == "domain":
+                mask = self._domain(argument, columns[column])
+            else:
+                if column not in numeric:
+                    numeric[column] = as_float(columns[column])
+                values = numeric[column]
+                if kind == "missing":
+                    mask = ~np.isfinite(values)
+                else:
+                    low, high = argument
+                    mask = np.zeros(n_rows, dtype=bool)
+                    # NaN compares False: those rows are counted as missing only
+                    with np.errstate(invalid="ignore"):
+                        if low is not None:
+                            mask |= values < low
+                        if high is not None:
+                            mask |= values > high
+            count = int(np.count_nonzero(mask))
+            if count:
+                violations[mask] |= 1 << bit
+                counts[name] = count
+
+        result = ValidationResult(violations == 0, violations, counts, rule_names)
+        with self._lock:
+            self.rows_checked += n_rows
+            self.rows_rejected += result.bad_count
+            self.seconds += time.perf_counter() - started
+            for name, count in counts.items():
+                self.violation_totals[name] += count
+        return result
+
+    @staticmethod
+    def _domain(categories, column):
+        return categories.get_indexer(np.asarray(column, dtype=object)) == -1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": ValidationConfig.ENABLED,
+                "rows_checked": self.rows_checked,
+                "rows_rejected": self.rows_rejected,
+                "seconds": self.seconds,
+                "violations": {name: count for name, count in self.violation_totals.items() if count},
+            }
+
+
+def as_float(column):
+    """Float64 array of a column; unparseable values become NaN"""
+    values = np.asarray(column)
+    if values.dtype.kind in "fiub":
+        return values.astype(np.float64, copy=False)
+    # Text or mixed values: anything unparseable becomes NaN (a missing value)
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def row_columns(rows, names=PREDICTION_COLUMNS):
+    """Column arrays of row tuples (in `names` order) for `RowValidator.validate`"""
+    if not rows:
+        return {name: np.empty(0) for name in names}
+    return {name: np.asarray(values, dtype=object if isinstance(values[0], str) else None)
+            for name, values in zip(names, zip(*rows))}
+
+
+def split_rows(rows, result):
+    """(good rows, quarantine rows) of a validated batch; quarantine rows end with their reasons"""
+    if not result.counts:
+        return rows, []
+    good = list(compress(rows, result.good))
+    bad = compress(rows, ~result.good)
+    return good, [row + (reason,) for row, reason in zip(bad, result.reasons())]
@@ -0,0 +1,82 @@
+-- Migrate an existing single-heap `predictions` table to the monthly
+-- partitioned layout in setup.sql
+--
+-- Run inside the Aqua database while the API is stopped (writes would be lost):
+--   psql -d aqua -f migrations/001_partition_predictions.sql
+-- The old table is kept as `predictions_legacy` until you drop it.
+BEGIN;
+
+ALTER TABLE predictions RENAME TO predictions_legacy;
+ALTER SEQUENCE predictions_id_seq RENAME TO predictions_legacy_id_seq;
+ALTER INDEX predictions_pkey RENAME TO predictions_legacy_pkey;
+
+CREATE TABLE predictions (
+    id SERIAL,
+    ph FLOAT,
+    iron FLOAT,
+    nitrate FLOAT,
+    chloride FLOAT,
+    lead FLOAT,
+    zinc FLOAT,
+    color VARCHAR(50),
+    turbidity FLOAT,
+    fluoride FLOAT,
+    copper FLOAT,
+    odor VARCHAR(50),
+    sulfate FLOAT,
+    conductivity FLOAT,
+    chlorine FLOAT,
+    manganese FLOAT,
+    tds FLOAT,
+    source VARCHAR(50),
+    water_temp FLOAT,
+    air_temp FLOAT,
+    month INT,
+    day INT,
+    time_of_day VARCHAR(50),
+    prediction int,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE predictions_default PARTITION OF predictions DEFAULT;
+
+-- One partition per month that already holds data
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', timestamp)::DATE
+        FROM predictions_legacy
+        WHERE timestamp IS NOT NULL
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF predictions FOR VALUES FROM (%L) TO (%L)',
+            'predictions_' || to_char(month_start, 'YYYY_MM'),
+            month_start, month_start + INTERVAL '1 month'
+        );
+    END LOOP;
+END;
+$$;
+
+-- Copy before indexing so the indexes are built once instead of row by row
+INSERT INTO predictions
+SELECT id, ph, iron, nitrate, chloride, lead, zinc, color, turbidity, fluoride,
+       copper, odor, sulfate, conductivity, chlorine, manganese, tds, source,
+       water_temp, air_temp, month, day, time_of_day, prediction,
+       COALESCE(timestamp, CURRENT_TIMESTAMP)
+FROM predictions_legacy;
+
+CREATE INDEX predictions_timestamp_id_idx ON predictions (timestamp DESC, id DESC);
+CREATE INDEX predictions_timestamp_brin ON predictions USING BRIN (timestamp)
+    WITH (pages_per_range = 32);
+
+-- New ids continue after the migrated ones
+SELECT setval('predictions_id_seq', COALESCE((SELECT max(id) FROM predictions), 0) + 1, false);
+
+COMMIT;
+
+-- Then add the partition maintenance functions and the upcoming months:
+--   psql -d aqua -f migrations/004_prediction_partition_functions.sql
+ANALYZE predictions;
@@ -0,0 +1,42 @@
+-- Add the dashboard rollup tables to an existing Aqua database
+--
+--   psql -d aqua -f migrations/002_prediction_rollups.sql
+-- The API fills them on its first refresh (or POST /admin/rollups?full=true).
+BEGIN;
+
+-- Hourly and daily aggregates for dashboards, rebuilt incrementally by the API
+-- (fast_api/rollups.py); `granularity` is 'hour' or 'day'
+CREATE TABLE prediction_rollups (
+    granularity VARCHAR(10) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    source VARCHAR(50),
+    time_of_day VARCHAR(50),
+    metric VARCHAR(50) NOT NULL,
+    row_count BIGINT NOT NULL,
+    mean FLOAT,
+    p50 FLOAT,
+    p95 FLOAT,
+    min FLOAT,
+    max FLOAT
+);
+CREATE INDEX prediction_rollups_bucket_idx ON prediction_rollups (granularity, bucket);
+
+CREATE TABLE prediction_class_rollups (
+    granularity VARCHAR(10) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    source VARCHAR(50),
+    time_of_day VARCHAR(50),
+    prediction INT,
+    row_count BIGINT NOT NULL
+);
+CREATE INDEX prediction_class_rollups_bucket_idx ON prediction_class_rollups (granularity, bucket);
+
+-- Newest prediction timestamp covered by the rollups
+CREATE TABLE prediction_rollup_state (
+    id INT PRIMARY KEY CHECK (id = 1),
+    watermark TIMESTAMP,
+    refreshed_at TIMESTAMP
+);
+INSERT INTO prediction_rollup_state (id) VALUES (1);
+
+COMMIT;
@@ -0,0 +1,38 @@
+-- Add the quarantine table for rows that fail validation to an existing Aqua database
+--
+--   psql -d aqua -f migrations/003_prediction_quarantine.sql
+BEGIN;
+
+-- Rows rejected by the API's data-quality checks (fast_api/validation.py),
+-- kept as received with the rules they broke, e.g. 'ph_range;lead_range'
+CREATE TABLE predictions_quarantine (
+    id SERIAL PRIMARY KEY,
+    ph FLOAT,
+    iron FLOAT,
+    nitrate FLOAT,
+    chloride FLOAT,
+    lead FLOAT,
+    zinc FLOAT,
+    color VARCHAR(50),
+    turbidity FLOAT,
+    fluoride FLOAT,
+    copper FLOAT,
+    odor VARCHAR(50),
+    sulfate FLOAT,
+    conductivity FLOAT,
+    chlorine FLOAT,
+    manganese FLOAT,
+    tds FLOAT,
+    source VARCHAR(50),
+    water_temp FLOAT,
+    air_temp FLOAT,
+    month INT,
+    day INT,
+    time_of_day VARCHAR(50),
+    prediction INT,
+    violations TEXT NOT NULL,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX predictions_quarantine_timestamp_idx ON predictions_quarantine (timestamp);
+
+COMMIT;
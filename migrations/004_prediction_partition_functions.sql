@@ -0,0 +1,78 @@
+-- Add the partition maintenance functions to a database migrated with
+-- 001_partition_predictions.sql (setup.sql itself cannot be re-run)
+--
+--   psql -d aqua -f migrations/004_prediction_partition_functions.sql
+-- The API calls them at startup and then every AQUA_PARTITION_INTERVAL seconds.
+BEGIN;
+
+-- Create the monthly partitions from the current month to `months_ahead` months out
+-- Returns the names of the partitions that were created
+--
+-- Rows for a missing month land in predictions_default, and Postgres refuses
+-- to create a partition whose range the default partition already holds rows
+-- for. Those rows are moved out first (writes to the default partition wait
+-- on the lock until the transaction commits).
+CREATE OR REPLACE FUNCTION create_prediction_partitions(months_ahead INT DEFAULT 3)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    month_start DATE;
+    partition_name TEXT;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        partition_name := 'predictions_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            LOCK TABLE predictions_default IN EXCLUSIVE MODE;
+            CREATE TEMP TABLE IF NOT EXISTS prediction_partition_moves
+                (LIKE predictions) ON COMMIT DROP;
+            TRUNCATE prediction_partition_moves;
+            WITH moved AS (
+                DELETE FROM predictions_default
+                WHERE timestamp >= month_start AND timestamp < month_start + INTERVAL '1 month'
+                RETURNING *
+            )
+            INSERT INTO prediction_partition_moves SELECT * FROM moved;
+
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF predictions FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_start + INTERVAL '1 month'
+            );
+            -- Routed into the new partition, ids and timestamps unchanged
+            INSERT INTO predictions SELECT * FROM prediction_partition_moves;
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Drop monthly partitions that ended more than `keep_months` months ago
+-- Returns the names of the partitions that were dropped
+CREATE OR REPLACE FUNCTION drop_prediction_partitions(keep_months INT)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => keep_months))::DATE;
+    partition_name TEXT;
+BEGIN
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'predictions'
+          AND child.relname ~ '^predictions_[0-9]{4}_[0-9]{2}$'
+        ORDER BY child.relname
+    LOOP
+        IF to_date(substring(partition_name FROM 13), 'YYYY_MM') < cutoff THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Moves any rows the default partition holds for these months
+SELECT create_prediction_partitions(3);
+
+COMMIT;
@@ -0,0 +1,12 @@
+-- Track the daily rollups' watermark separately from the hourly one
+--
+--   psql -d aqua -f migrations/005_rollup_day_watermark.sql
+-- Hourly buckets are then refreshed on every ingest and daily buckets on a
+-- slower schedule (AQUA_ROLLUP_DAILY_INTERVAL) or when a day closes.
+BEGIN;
+
+ALTER TABLE prediction_rollup_state ADD COLUMN day_watermark TIMESTAMP;
+-- Both granularities were rebuilt together until now
+UPDATE prediction_rollup_state SET day_watermark = watermark;
+
+COMMIT;
@@ -5,8 +5,10 @@ CREATE DATABASE Aqua;
 \c Aqua;
 
 -- Create Table to Store Predictions with Features and Target
+-- Range-partitioned by month on `timestamp`; the primary key has to include
+-- the partition key
 CREATE TABLE predictions (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     ph FLOAT,
     iron FLOAT,
     nitrate FLOAT,
@@ -30,8 +32,159 @@ CREATE TABLE predictions (
     day INT,
     time_of_day VARCHAR(50),
     prediction int,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Catches rows outside every monthly partition (e.g. clock skew)
+CREATE TABLE predictions_default PARTITION OF predictions DEFAULT;
+
+-- Indexes are declared on the parent and created on every partition
+-- Newest-first listing and keyset pagination: ORDER BY timestamp DESC, id DESC LIMIT n
+CREATE INDEX predictions_timestamp_id_idx ON predictions (timestamp DESC, id DESC);
+-- Cheap range index for date filters over large, append-only partitions
+CREATE INDEX predictions_timestamp_brin ON predictions USING BRIN (timestamp)
+    WITH (pages_per_range = 32);
+
+
+-- Hourly and daily aggregates for dashboards, rebuilt incrementally by the API
+-- (fast_api/rollups.py); `granularity` is 'hour' or 'day'
+CREATE TABLE prediction_rollups (
+    granularity VARCHAR(10) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    source VARCHAR(50),
+    time_of_day VARCHAR(50),
+    metric VARCHAR(50) NOT NULL,
+    row_count BIGINT NOT NULL,
+    mean FLOAT,
+    p50 FLOAT,
+    p95 FLOAT,
+    min FLOAT,
+    max FLOAT
+);
+CREATE INDEX prediction_rollups_bucket_idx ON prediction_rollups (granularity, bucket);
+
+CREATE TABLE prediction_class_rollups (
+    granularity VARCHAR(10) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    source VARCHAR(50),
+    time_of_day VARCHAR(50),
+    prediction INT,
+    row_count BIGINT NOT NULL
 );
+CREATE INDEX prediction_class_rollups_bucket_idx ON prediction_class_rollups (granularity, bucket);
+
+-- Newest prediction timestamp covered by the hourly (`watermark`) and the
+-- daily (`day_watermark`) rollups
+CREATE TABLE prediction_rollup_state (
+    id INT PRIMARY KEY CHECK (id = 1),
+    watermark TIMESTAMP,
+    day_watermark TIMESTAMP,
+    refreshed_at TIMESTAMP
+);
+INSERT INTO prediction_rollup_state (id) VALUES (1);
+
+
+-- Rows rejected by the API's data-quality checks (fast_api/validation.py),
+-- kept as received with the rules they broke, e.g. 'ph_range;lead_range'
+CREATE TABLE predictions_quarantine (
+    id SERIAL PRIMARY KEY,
+    ph FLOAT,
+    iron FLOAT,
+    nitrate FLOAT,
+    chloride FLOAT,
+    lead FLOAT,
+    zinc FLOAT,
+    color VARCHAR(50),
+    turbidity FLOAT,
+    fluoride FLOAT,
+    copper FLOAT,
+    odor VARCHAR(50),
+    sulfate FLOAT,
+    conductivity FLOAT,
+    chlorine FLOAT,
+    manganese FLOAT,
+    tds FLOAT,
+    source VARCHAR(50),
+    water_temp FLOAT,
+    air_temp FLOAT,
+    month INT,
+    day INT,
+    time_of_day VARCHAR(50),
+    prediction INT,
+    violations TEXT NOT NULL,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX predictions_quarantine_timestamp_idx ON predictions_quarantine (timestamp);
+
+
+-- Create the monthly partitions from the current month to `months_ahead` months out
+-- Returns the names of the partitions that were created
+--
+-- Rows for a missing month land in predictions_default, and Postgres refuses
+-- to create a partition whose range the default partition already holds rows
+-- for. Those rows are moved out first (writes to the default partition wait
+-- on the lock until the transaction commits).
+CREATE OR REPLACE FUNCTION create_prediction_partitions(months_ahead INT DEFAULT 3)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    month_start DATE;
+    partition_name TEXT;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        partition_name := 'predictions_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            LOCK TABLE predictions_default IN EXCLUSIVE MODE;
+            CREATE TEMP TABLE IF NOT EXISTS prediction_partition_moves
+                (LIKE predictions) ON COMMIT DROP;
+            TRUNCATE prediction_partition_moves;
+            WITH moved AS (
+                DELETE FROM predictions_default
+                WHERE timestamp >= month_start AND timestamp < month_start + INTERVAL '1 month'
+                RETURNING *
+            )
+            INSERT INTO prediction_partition_moves SELECT * FROM moved;
+
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF predictions FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_start + INTERVAL '1 month'
+            );
+            -- Routed into the new partition, ids and timestamps unchanged
+            INSERT INTO predictions SELECT * FROM prediction_partition_moves;
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Drop monthly partitions that ended more than `keep_months` months ago
+-- Returns the names of the partitions that were dropped
+CREATE OR REPLACE FUNCTION drop_prediction_partitions(keep_months INT)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => keep_months))::DATE;
+    partition_name TEXT;
+BEGIN
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'predictions'
+          AND child.relname ~ '^predictions_[0-9]{4}_[0-9]{2}$'
+        ORDER BY child.relname
+    LOOP
+        IF to_date(substring(partition_name FROM 13), 'YYYY_MM') < cutoff THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+            RETURN NEXT partition_name;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
 
+SELECT create_prediction_partitions(3);
 
 select * from predictions
@@ -1,67 +1,73 @@
 import streamlit as st
 import pandas as pd
-import joblib
-import requests
-from sklearn.preprocessing import LabelEncoder
+from scoring import DEFAULT_CHUNK_SIZE, ParallelScorer, RowValidator, score_chunks
+from utils import get_write_queue
 
-# Load model and encoders
-model = joblib.load("water_quality_model.pkl")
-encoder_source = LabelEncoder().fit(["River", "Lake", "Groundwater", "Well"])
-encoder_color = LabelEncoder().fit(["Clear", "Brown", "Yellow", "Green"])
-encoder_odor = LabelEncoder().fit(["Odorless", "Foul", "Metallic"])
-encoder_time = LabelEncoder().fit(["Morning", "Afternoon", "Evening", "Night"])
+# Rows rendered in the upload and result previews
+PREVIEW_ROWS = 100
 
-FASTAPI_SAVE_URL = "http://127.0.0.1:8000/save_predictions/"
+
+# One process pool per Streamlit server; each worker loads the model once
+@st.cache_resource
+def get_scorer():
+    return ParallelScorer("water_quality_model.pkl")
 
 def batch_prediction():
     st.header("Batch Prediction via CSV Upload")
     uploaded_file = st.file_uploader("Upload CSV File", type=["csv"])
 
     if uploaded_file is not None:
-        original_data = pd.read_csv(uploaded_file)
-        st.write("Preview of Uploaded Data:")
-        st.dataframe(original_data)
-
-        # Handle missing or unknown values
-        original_data["Source"] = original_data["Source"].fillna("River")
-        original_data["Color"] = original_data["Color"].fillna("Clear")
-        original_data["Odor"] = original_data["Odor"].fillna("Odorless")
-        original_data["Time of Day"] = original_data["Time of Day"].fillna("Morning")
-
-        # Encode categorical columns
-        input_data = original_data.copy()
-        input_data["Source"] = encoder_source.transform(input_data["Source"])
-        input_data["Color"] = encoder_color.transform(input_data["Color"])
-        input_data["Odor"] = encoder_odor.transform(input_data["Odor"])
-        input_data["Time of Day"] = encoder_time.transform(input_data["Time of Day"])
+        # Only a sample is parsed and rendered; the file is scored in chunks
+        st.write(f"Preview of Uploaded Data (first {PREVIEW_ROWS} rows):")
+        st.dataframe(pd.read_csv(uploaded_file, nrows=PREVIEW_ROWS))
+        uploaded_file.seek(0)
 
         if st.button("Predict Batch Data"):
-            predictions = model.predict(input_data)
-            original_data["Prediction"] = predictions
-            st.write("Prediction Results:")
-            st.dataframe(original_data)
+            progress = st.progress(0.0, text="Scoring...")
+            preview = None
+            rows = 0
+            counts = pd.Series(dtype="int64")
+            # Rows failing the data-quality rules are skipped and reported below;
+            # categorical domains are those of the encoder saved with the model
+            validator = RowValidator(categories=get_scorer().encoder.categories)
+            rejected = []
 
-            # Prepare payload for FastAPI
-            batch_payloads = []
-            for _, row in original_data.iterrows():
-                payload = {
-                    "ph": row["pH"], "iron": row["Iron"], "nitrate": row["Nitrate"],
-                    "chloride": row["Chloride"], "lead": row["Lead"], "zinc": row["Zinc"],
-                    "color": row["Color"], "turbidity": row["Turbidity"], "fluoride": row["Fluoride"],
-                    "copper": row["Copper"], "odor": row["Odor"], "sulfate": row["Sulfate"],
-                    "conductivity": row["Conductivity"], "chlorine": row["Chlorine"],
-                    "manganese": row["Manganese"], "tds": row["Total Dissolved Solids"],
-                    "source": row["Source"], "water_temp": row["Water Temperature"],
-                    "air_temp": row["Air Temperature"], "month": row["Month"], "day": row["Day"],
-                    "time_of_day": row["Time of Day"], "prediction": row["Prediction"],
-                }
-                batch_payloads.append(payload)
+            def keep_rejected(frame):
+                if sum(len(part) for part in rejected) < PREVIEW_ROWS:
+                    rejected.append(frame.head(PREVIEW_ROWS))
 
             try:
-                response = requests.post(FASTAPI_SAVE_URL, json=batch_payloads)
-                if response.status_code == 200:
-                    st.info("Batch predictions saved to database successfully.")
-                else:
-                    st.error(f"Error saving batch predictions: {response.text}")
+                # Chunks are journaled and saved in the background
+                for scored in score_chunks(
+                    uploaded_file, get_scorer(), DEFAULT_CHUNK_SIZE, write_queue=get_write_queue(),
+                    validator=validator, on_rejected=keep_rejected,
+                ):
+                    if preview is None:
+                        preview = scored.head(PREVIEW_ROWS)
+                    rows += len(scored)
+                    counts = counts.add(scored["prediction"].value_counts(), fill_value=0)
+                    done = min(uploaded_file.tell() / uploaded_file.size, 1.0)
+                    progress.progress(done, text=f"Scored and queued {rows:,} rows")
+            except ValueError as e:
+                st.error(f"Invalid CSV: {e}")
+                return
             except Exception as e:
-                st.error(f"Error in sending batch predictions: {e}")
\ No newline at end of file
+                st.error(f"Error in queueing batch predictions after {rows:,} rows: {e}")
+                return
+
+            progress.progress(1.0, text=f"Scored and queued {rows:,} rows")
+            checks = validator.stats()
+            if checks["rows_rejected"]:
+                st.warning(
+                    f"{checks['rows_rejected']:,} of {checks['rows_checked']:,} rows failed "
+                    "data-quality checks and were not scored."
+                )
+                st.dataframe(pd.Series(checks["violations"], name="rows"))
+                st.write(f"Rejected rows (first {PREVIEW_ROWS}):")
+                st.dataframe(pd.concat(rejected).head(PREVIEW_ROWS))
+            st.write(f"Prediction Results (first {PREVIEW_ROWS} of {rows:,} rows):")
+            st.dataframe(preview)
+            st.write("Predictions per class:")
+            st.dataframe(counts.astype("int64").rename("rows"))
+            pending = get_write_queue().stats()["pending_rows"]
+            st.info(f"Batch predictions queued for saving ({pending:,} rows still being written).")
@@ -1,11 +1,43 @@
 import streamlit as st
+import pandas as pd
 import requests
 
 FASTAPI_GET_URL = "http://127.0.0.1:8000/get_predictions/"
+FASTAPI_STATS_URL = "http://127.0.0.1:8000/predictions/stats"
+
+# Rows per page; each page is one keyset-paginated request, so memory stays
+# flat however many rows the date range holds
+PAGE_SIZE = 1000
+
+
+def fetch_page(params, cursor=None):
+    """(page of predictions, cursor of the next page or None), or None on an API error"""
+    page_params = {**params, "format": "json", "limit": PAGE_SIZE}
+    if cursor:
+        page_params["cursor"] = cursor
+    response = requests.get(FASTAPI_GET_URL, params=page_params)
+    if response.status_code != 200:
+        return None
+    return pd.DataFrame(response.json()), response.headers.get("X-Next-Cursor")
+
+
+# Paging state: the cursor of every page visited so far, for "Previous page"
+def _start(params):
+    st.session_state.past_params = params
+    st.session_state.past_cursors = [None]
+
+
+def _next_page():
+    st.session_state.past_cursors.append(st.session_state.past_next_cursor)
+
+
+def _previous_page():
+    st.session_state.past_cursors.pop()
+
 
 def past_predictions():
     st.header("Past Predictions")
-    st.write("Select a date range to filter past predictions (leave empty to fetch all):")
+    st.write("Select a date range to filter past predictions (leave empty to fetch the latest):")
 
     # Date inputs
     start = st.date_input("Start Date", value=None)
@@ -18,16 +50,41 @@ def past_predictions():
     if end:
         params["end_date"] = end.isoformat()
 
-    if st.button("Fetch Predictions"):
+    st.button("Fetch Predictions", on_click=_start, args=(params,))
+    cursors = st.session_state.get("past_cursors")
+    if cursors:
         try:
-            response = requests.get(FASTAPI_GET_URL, params=params)
-            if response.status_code == 200:
-                predictions = response.json()
-                if predictions:
+            page = fetch_page(st.session_state.past_params, cursors[-1])
+            if page is None:
+                st.error("Error fetching predictions from database.")
+            else:
+                predictions, next_cursor = page
+                st.session_state.past_next_cursor = next_cursor
+                if not predictions.empty:
+                    st.write(f"Page {len(cursors)} ({len(predictions):,} rows, newest first):")
                     st.dataframe(predictions)
                 else:
                     st.info("No predictions found for the selected date range.")
+                previous_column, next_column = st.columns(2)
+                previous_column.button("Previous page", on_click=_previous_page, disabled=len(cursors) == 1)
+                next_column.button("Next page", on_click=_next_page, disabled=next_cursor is None)
+        except Exception as e:
+            st.error(f"Error: {e}")
+
+    # Daily counts come from the rollup tables, not from raw rows
+    if st.button("Show Daily Summary"):
+        try:
+            response = requests.get(FASTAPI_STATS_URL, params={"granularity": "day", **params})
+            if response.status_code == 200:
+                classes = pd.DataFrame(response.json()["classes"])
+                if not classes.empty:
+                    daily = classes.pivot_table(
+                        index="bucket", columns="prediction", values="row_count", aggfunc="sum"
+                    )
+                    st.bar_chart(daily)
+                else:
+                    st.info("No predictions found for the selected date range.")
             else:
-                st.error("Error fetching predictions from database.")
+                st.error("Error fetching prediction summary.")
         except Exception as e:
-            st.error(f"Error: {e}")
\ No newline at end of file
+            st.error(f"Error: {e}")
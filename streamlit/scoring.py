@@ -0,0 +1,200 @@
+# Chunked CSV scoring: read, encode, predict and save one chunk at a time
+#
+# Memory stays bounded by the chunk size, so files larger than RAM can be scored.
+# Also runnable as a CLI for offline scoring of files on disk:
+#   python streamlit/scoring.py sensors.csv --output scored.csv
+#   python streamlit/scoring.py sensors.csv --save-url http://127.0.0.1:8000/save_predictions/
+#   python streamlit/scoring.py sensors.csv --workers 8 --output scored.csv
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+# Model loading and preprocessing are shared with the API
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+from forest import ForestConfig, load_forest  # noqa: E402
+from preprocessing import (  # noqa: E402
+    CATEGORIES,
+    CSV_COLUMNS,
+    encode_frame,
+    load_encoder,
+    prepare_frame,
+    to_payload_json,
+)
+from validation import RowValidator  # noqa: E402
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Smallest shard worth shipping to another process
+MIN_SHARD_ROWS = 2_000
+
+# Pinned CSV dtypes: no type inference per chunk, no object columns for numbers
+CSV_DTYPES = {
+    column: (str if name in CATEGORIES else "float64")
+    for column, name in CSV_COLUMNS.items()
+}
+
+
+# Model loaded once per worker process by `_init_worker`
+_worker_model = None
+
+
+def _init_worker(model_path):
+    global _worker_model
+    # Saved tables are memory-mapped: workers share them through the page cache
+    # One thread per process; the pool already uses every core
+    _worker_model = load_forest(model_path, n_jobs=1)
+
+
+def _predict_shard(features):
+    return _worker_model.predict(features)
+
+
+class ParallelScorer:
+    """
+    Shard feature matrices across a process pool and reassemble predictions in order
+
+    - Each worker loads the model once, at pool start
+    - `encoder` is the category encoding saved with the model
+    - Inputs smaller than two shards are predicted in this process
+    - `workers=1` uses no pool; the forest then predicts with `n_jobs` threads
+      (single-threaded `n_jobs` uses the compiled forest instead)
+    - Drop-in for a model in `score_chunks` (exposes `predict`)
+    """
+
+    def __init__(self, model_path, workers=None, n_jobs=None, min_shard_rows=MIN_SHARD_ROWS):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_shard_rows = min_shard_rows
+        self.model = load_forest(model_path, n_jobs, enabled=ForestConfig.ENABLED and n_jobs in (None, 1))
+        self.encoder = load_encoder(model_path)
+        self._pool = None
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(
+                self.workers, initializer=_init_worker, initargs=(model_path,)
+            )
+
+    def predict(self, features):
+        shards = min(self.workers, len(features) // self.min_shard_rows)
+        if self._pool is None or shards < 2:
+            return self.model.predict(features)
+        # executor.map yields results in submission order
+        return np.concatenate(list(self._pool.map(_predict_shard, np.array_split(features, shards))))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Iterate over a CSV (path or file object) in frames of `chunk_size` rows"""
+    return pd.read_csv(
+        source,
+        dtype=CSV_DTYPES,
+        usecols=lambda column: column in CSV_COLUMNS,
+        chunksize=chunk_size,
+    )
+
+
+def score_chunks(source, model, chunk_size=DEFAULT_CHUNK_SIZE, save_url=None, session=None,
+                 write_queue=None, encoder=None, unknown="error", unknown_counts=None,
+                 validator=None, on_rejected=None):
+    """
+    Generator of scored chunks (API field names plus `prediction`)
+
+    - Each chunk is prepared, encoded and predicted on its own
+    - With `save_url`, each chunk is posted to /save_predictions/ before the
+      next one is read; a failed save raises `requests.HTTPError`
+    - With `write_queue` (a WriteBehindQueue), each chunk is journaled instead
+      and saved in the background; a full journal pauses scoring
+    - `encoder` defaults to the one saved with `model` (a ParallelScorer)
+    - With `validator` (a RowValidator), rows failing the data-quality rules
+      are neither scored nor saved; they are passed to `on_rejected` as a
+      frame with a `violations` column
+    - Raises ValueError on missing columns, and on unknown categorical values
+      unless `unknown="default"` (replacements are added to `unknown_counts`)
+    """
+    encoder = encoder or getattr(model, "encoder", None)
+    session = session or requests.Session()
+    for chunk in read_chunks(source, chunk_size):
+        frame = prepare_frame(chunk)
+        if validator is not None:
+            result = validator.validate(frame)
+            if result.counts:
+                if on_rejected is not None:
+                    on_rejected(frame[~result.good].assign(violations=result.reasons()))
+                frame = frame[result.good]
+            if frame.empty:
+                continue
+        predictions = model.predict(encode_frame(frame, encoder, unknown, unknown_counts))
+
+        if write_queue is not None:
+            write_queue.put(to_payload_json(frame, predictions), len(frame))
+        elif save_url:
+            response = session.post(
+                save_url,
+                data=to_payload_json(frame, predictions),
+                headers={"Content-Type": "application/json"},
+            )
+            response.raise_for_status()
+
+        yield frame.assign(prediction=predictions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a water-quality CSV in chunks")
+    parser.add_argument("input", help="CSV file with the sensor columns")
+    parser.add_argument("--output", help="write scored rows to this CSV")
+    parser.add_argument("--model", default="water_quality_model.pkl")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--save-url", help="post each scored chunk to this /save_predictions/ URL")
+    parser.add_argument("--workers", type=int, help="scoring processes (default: all cores)")
+    parser.add_argument("--n-jobs", type=int, help="forest threads when --workers 1 (-1: all cores)")
+    parser.add_argument("--rejected-output", help="write rows failing validation to this CSV")
+    args = parser.parse_args()
+
+    # Categorical domains of the encoder saved with the model
+    validator = RowValidator(categories=load_encoder(args.model).categories)
+    rejected_chunks = [0]
+
+    def write_rejected(rejected):
+        if args.rejected_output:
+            rejected.to_csv(args.rejected_output, mode="w" if rejected_chunks[0] == 0 else "a",
+                            header=rejected_chunks[0] == 0, index=False)
+            rejected_chunks[0] += 1
+
+    total_bytes = os.path.getsize(args.input)
+    started = time.perf_counter()
+    rows = 0
+
+    with ParallelScorer(args.model, args.workers, args.n_jobs) as model, \
+            open(args.input, "rb") as handle:
+        for number, scored in enumerate(
+            score_chunks(handle, model, args.chunk_size, args.save_url,
+                         validator=validator, on_rejected=write_rejected)
+        ):
+            if args.output:
+                scored.to_csv(args.output, mode="w" if number == 0 else "a",
+                              header=number == 0, index=False)
+            rows += len(scored)
+            done = min(handle.tell() / total_bytes, 1.0) if total_bytes else 1.0
+            print(f"{rows:>12,} rows  {done:6.1%}  {rows / (time.perf_counter() - started):10,.0f} rows/s")
+
+    stats = validator.stats()
+    if stats["rows_rejected"]:
+        print(f"Rejected {stats['rows_rejected']:,} of {stats['rows_checked']:,} rows: {stats['violations']}")
+
+
+if __name__ == "__main__":
+    main()
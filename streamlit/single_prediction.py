@@ -1,17 +1,37 @@
+import os
+import sys
+import json
 import streamlit as st
-import joblib
-import requests
 from datetime import datetime
-from sklearn.preprocessing import LabelEncoder
 
-# Load model and encoders
-model = joblib.load("water_quality_model.pkl")
-encoder_source = LabelEncoder().fit(["River", "Lake", "Groundwater", "Well"])
-encoder_color = LabelEncoder().fit(["Clear", "Brown", "Yellow", "Green"])
-encoder_odor = LabelEncoder().fit(["Odorless", "Foul", "Metallic"])
-encoder_time = LabelEncoder().fit(["Morning", "Afternoon", "Evening", "Night"])
+# Model loading and preprocessing are shared with the API
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+from forest import load_forest  # noqa: E402
+from model_store import model_version  # noqa: E402
+from prediction_cache import PredictionCache  # noqa: E402
+from preprocessing import encode_features, load_encoder  # noqa: E402
+from utils import get_write_queue  # noqa: E402
+from validation import RowValidator  # noqa: E402
+from write_behind import QueueFull  # noqa: E402
 
-FASTAPI_SAVE_URL = "http://127.0.0.1:8000/save_predictions/"
+MODEL_PATH = "water_quality_model.pkl"
+
+
+# Model, its encoder and the prediction cache live once per Streamlit server, not once per rerun
+@st.cache_resource
+def get_model():
+    return load_forest(MODEL_PATH), model_version(MODEL_PATH), load_encoder(MODEL_PATH)
+
+
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache()
+
+
+@st.cache_resource
+def get_validator():
+    # Categorical domains of the encoder saved with the model
+    return RowValidator(categories=get_model()[2].categories)
 
 def single_prediction():
     st.header("Input Water Quality Parameters")
@@ -42,38 +62,41 @@ def single_prediction():
     odor = st.selectbox("Odor", ["Odorless", "Foul", "Metallic"])
     time_of_day = st.selectbox("Time of Day", ["Morning", "Afternoon", "Evening", "Night"])
 
-    # Encode categorical values
-    source_encoded = encoder_source.transform([source])[0]
-    color_encoded = encoder_color.transform([color])[0]
-    odor_encoded = encoder_odor.transform([odor])[0]
-    time_encoded = encoder_time.transform([time_of_day])[0]
-
-    # Prepare data for prediction
-    input_data = [
-        ph, iron, nitrate, chloride, lead, zinc, color_encoded, turbidity, fluoride,
-        copper, odor_encoded, sulfate, conductivity, chlorine, manganese, tds,
-        source_encoded, water_temp, air_temp, month, day, time_encoded,
-    ]
+    # Raw input in API field names
+    record = {
+        "ph": ph, "iron": iron, "nitrate": nitrate, "chloride": chloride,
+        "lead": lead, "zinc": zinc, "color": color, "turbidity": turbidity,
+        "fluoride": fluoride, "copper": copper, "odor": odor, "sulfate": sulfate,
+        "conductivity": conductivity, "chlorine": chlorine, "manganese": manganese,
+        "tds": tds, "source": source, "water_temp": water_temp, "air_temp": air_temp,
+        "month": month, "day": day, "time_of_day": time_of_day,
+    }
 
     if st.button("Predict Water Quality"):
-        prediction = model.predict([input_data])[0]
+        result = get_validator().validate({name: [value] for name, value in record.items()})
+        if result.counts:
+            st.error(f"Input failed data-quality checks: {', '.join(result.counts)}")
+            return
+
+        model, version, encoder = get_model()
+        cache = get_prediction_cache()
+        prediction = cache.predict(encode_features([record], encoder), model.predict, version)[0]
         st.success(f"Predicted Water Quality: {prediction:.2f}")
 
         # Prepare payload for FastAPI
-        payload = {
-            "ph": ph, "iron": iron, "nitrate": nitrate, "chloride": chloride,
-            "lead": lead, "zinc": zinc, "color": color, "turbidity": turbidity,
-            "fluoride": fluoride, "copper": copper, "odor": odor, "sulfate": sulfate,
-            "conductivity": conductivity, "chlorine": chlorine, "manganese": manganese,
-            "tds": tds, "source": source, "water_temp": water_temp, "air_temp": air_temp,
-            "month": month, "day": day, "time_of_day": time_of_day, "prediction": prediction,
-        }
+        payload = {**record, "prediction": prediction.item()}
 
+        # Journaled locally and saved in the background; never waits on the database
         try:
-            response = requests.post(FASTAPI_SAVE_URL, json=[payload])
-            if response.status_code == 200:
-                st.info("Prediction saved to database successfully.")
-            else:
-                st.error("Error saving prediction to database.")
+            get_write_queue().put(json.dumps([payload]).encode(), 1, timeout=0)
+            st.info("Prediction queued for saving to database.")
+        except QueueFull:
+            st.error("Too many predictions waiting to be saved; try again shortly.")
         except Exception as e:
-            st.error(f"Error: {e}")
\ No newline at end of file
+            st.error(f"Error: {e}")
+
+        stats = cache.stats()
+        st.caption(
+            f"Prediction cache: {stats['hit_rate']:.0%} hit rate over "
+            f"{stats['hits'] + stats['misses']} lookups, {stats['seconds_saved'] * 1000:.1f} ms saved"
+        )
\ No newline at end of file
@@ -1,12 +1,22 @@
-import joblib
-from sklearn.preprocessing import LabelEncoder
+import os
+import sys
+import streamlit as st
+
+from config import FASTAPI_SAVE_URL
+from write_behind import WriteBehindQueue
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+from model_store import load_model as load_artifact  # noqa: E402
+from preprocessing import load_encoder as load_encoder_artifact  # noqa: E402
 
 def load_model():
-    return joblib.load("water_quality_model.pkl")
-
-def load_encoders():
-    encoder_source = LabelEncoder().fit(["River", "Lake", "Groundwater", "Well"])
-    encoder_color = LabelEncoder().fit(["Clear", "Brown", "Yellow", "Green"])
-    encoder_odor = LabelEncoder().fit(["Odorless", "Foul", "Metallic"])
-    encoder_time = LabelEncoder().fit(["Morning", "Afternoon", "Evening", "Night"])
-    return encoder_source, encoder_color, encoder_odor, encoder_time
\ No newline at end of file
+    return load_artifact("water_quality_model.pkl")
+
+# One journal and drain thread per Streamlit server, shared by every page
+@st.cache_resource
+def get_write_queue():
+    return WriteBehindQueue(FASTAPI_SAVE_URL)
+
+# Category encoding saved with the model (shared with training and the API)
+def load_encoder():
+    return load_encoder_artifact("water_quality_model.pkl")
\ No newline at end of file
@@ -0,0 +1,225 @@
+# Write-behind queue for saving predictions without blocking the Streamlit rerun
+#
+# Each save is journaled to disk first (one fsync'ed file per batch), then a
+# background thread drains the journal to /save_predictions/ in merged,
+# retried posts over one keep-alive session. Batches survive a restart of
+# the Streamlit server and are deleted only after the API has committed them.
+import os
+import time
+import logging
+import threading
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+# Write-behind Configuration
+class WriteBehindConfig:
+    JOURNAL_DIR = os.environ.get("AQUA_JOURNAL_DIR", "prediction_journal")
+    # Rows journaled but not yet saved; beyond this `put` waits (or fails)
+    MAX_PENDING_ROWS = int(os.environ.get("AQUA_JOURNAL_MAX_ROWS", "1000000"))
+    # Rows merged into one POST
+    MAX_POST_ROWS = int(os.environ.get("AQUA_JOURNAL_POST_ROWS", "50000"))
+    # Backoff between failed posts (seconds, doubled up to the maximum)
+    RETRY_INITIAL = float(os.environ.get("AQUA_JOURNAL_RETRY_INITIAL", "0.5"))
+    RETRY_MAX = float(os.environ.get("AQUA_JOURNAL_RETRY_MAX", "30"))
+
+
+class QueueFull(Exception):
+    """Raised when the journal stays full for longer than the `put` timeout."""
+
+
+def merge_json_arrays(bodies):
+    """Concatenate serialized JSON arrays without parsing them"""
+    items = [body.strip()[1:-1].strip() for body in bodies]
+    return b"[" + b",".join(item for item in items if item) + b"]"
+
+
+class WriteBehindQueue:
+    """
+    Bounded, durable queue of serialized prediction batches
+
+    - `put` journals a JSON array body and returns once it is on disk
+    - The drain thread posts journaled batches oldest first, merging small
+      ones up to `max_post_rows`, and deletes them once the API answers 2xx
+    - Connection errors and 5xx are retried with exponential backoff;
+      batches the API rejects with 4xx move to `<journal>/rejected`
+    """
+
+    def __init__(self, url, journal_dir=WriteBehindConfig.JOURNAL_DIR,
+                 max_pending_rows=WriteBehindConfig.MAX_PENDING_ROWS,
+                 max_post_rows=WriteBehindConfig.MAX_POST_ROWS):
+        self.url = url
+        self.journal_dir = journal_dir
+        self.rejected_dir = os.path.join(journal_dir, "rejected")
+        self.max_pending_rows = max_pending_rows
+        self.max_post_rows = max_post_rows
+        self.session = requests.Session()
+        os.makedirs(self.rejected_dir, exist_ok=True)
+
+        self._condition = threading.Condition()
+        self._sequence = 0
+        # Rows of `put` calls still writing their journal file
+        self._reserved_rows = 0
+        # Oldest first: (file name, rows); rebuilt from the journal at start
+        self._pending = []
+        for name in sorted(os.listdir(journal_dir)):
+            if name.endswith(".json.tmp"):
+                # Left by a crash inside `put`, which never returned for it
+                os.remove(os.path.join(journal_dir, name))
+                continue
+            if name.endswith(".json"):
+                self._pending.append((name, int(name.split("-")[1].split(".")[0])))
+                self._sequence = max(self._sequence, int(name.split("-")[0]) + 1)
+
+        # Metrics
+        self.saved_rows = 0
+        self.rejected_rows = 0
+        self.failed_posts = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending_rows(self):
+        return sum(rows for _, rows in self._pending) + self._reserved_rows
+
+    def put(self, body, rows, timeout=None):
+        """
+        Journal one serialized JSON array of `rows` predictions
+
+        Waits for room while the journal is full; raises QueueFull after
+        `timeout` seconds (None waits indefinitely).
+        """
+        with self._condition:
+            has_room = self._condition.wait_for(
+                lambda: self.pending_rows == 0 or self.pending_rows + rows <= self.max_pending_rows,
+                timeout,
+            )
+            if not has_room:
+                raise QueueFull(f"{self.pending_rows} rows waiting to be saved")
+            # File name carries order and row count: <sequence>-<rows>.json
+            name = f"{self._sequence:012d}-{rows}.json"
+            self._sequence += 1
+            self._reserved_rows += rows
+
+        try:
+            temporary = os.path.join(self.journal_dir, name + ".tmp")
+            with open(temporary, "wb") as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, os.path.join(self.journal_dir, name))
+        except OSError:
+            with self._condition:
+                self._reserved_rows -= rows
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self._reserved_rows -= rows
+            self._pending.append((name, rows))
+            self._pending.sort()
+            self._condition.notify_all()
+
+    def _next_group(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending)
+            group, size = [], 0
+            for name, rows in self._pending:
+                if group and size + rows > self.max_post_rows:
+                    break
+                group.append((name, rows))
+                size += rows
+            return group, size
+
+    def _post(self, group):
+        bodies = []
+        for name, _ in group:
+            with open(os.path.join(self.journal_dir, name), "rb") as f:
+                bodies.append(f.read())
+        return self.session.post(
+            self.url,
+            data=merge_json_arrays(bodies),
+            headers={"Content-Type": "application/json"},
+        )
+
+    def _finish(self, group, rejected=False):
+        for name, _ in group:
+            path = os.path.join(self.journal_dir, name)
+            if rejected:
+                os.replace(path, os.path.join(self.rejected_dir, name))
+            else:
+                os.remove(path)
+        with self._condition:
+            done = set(group)
+            self._pending = [entry for entry in self._pending if entry not in done]
+            self._condition.notify_all()
+
+    def _run(self):
+        delay = WriteBehindConfig.RETRY_INITIAL
+        while True:
+            group, size = self._next_group()
+            try:
+                response = self._post(group)
+            except requests.RequestException as e:
+                response, self.last_error = None, str(e)
+
+            if response is not None and response.ok:
+                self._finish(group)
+                self.saved_rows += size
+                delay = WriteBehindConfig.RETRY_INITIAL
+                continue
+
+            if response is not None and 400 <= response.status_code < 500 and response.status_code != 429:
+                if len(group) == 1:
+                    self.last_error = response.text
+                    logger.error("Journaled batch %s rejected: %s", group[0][0], response.text)
+                    self._finish(group, rejected=True)
+                    self.rejected_rows += size
+                    continue
+                # Find the bad batch: retry the batches one by one, stopping
+                # at the first failure that is not the batch's own fault
+                if all(self._retry_single(entry) for entry in group):
+                    delay = WriteBehindConfig.RETRY_INITIAL
+                    continue
+            elif response is not None:
+                self.last_error = f"{response.status_code}: {response.text}"
+            self.failed_posts += 1
+            logger.warning("Saving %d journaled rows failed, retrying in %.1fs: %s",
+                           size, delay, self.last_error)
+            time.sleep(delay)
+            delay = min(delay * 2, WriteBehindConfig.RETRY_MAX)
+
+    def _retry_single(self, entry):
+        # True once the batch is saved or rejected; False when it should be retried later
+        try:
+            response = self._post([entry])
+        except requests.RequestException as e:
+            self.last_error = str(e)
+            return False
+        if response.ok:
+            self._finish([entry])
+            self.saved_rows += entry[1]
+            return True
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            self.last_error = response.text
+            logger.error("Journaled batch %s rejected: %s", entry[0], response.text)
+            self._finish([entry], rejected=True)
+            self.rejected_rows += entry[1]
+            return True
+        self.last_error = f"{response.status_code}: {response.text}"
+        return False
+
+    def stats(self):
+        with self._condition:
+            return {
+                "pending_batches": len(self._pending),
+                "pending_rows": self.pending_rows,
+                "saved_rows": self.saved_rows,
+                "rejected_rows": self.rejected_rows,
+                "failed_posts": self.failed_posts,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,98 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+
+from forest import CompiledForest, check_parity, load_forest, load_tables, save_tables  # noqa: E402
+from model_store import save_model  # noqa: E402
+
+
+def fit_forest(n_classes=2, seed=0):
+    # Small forest on noisy data, with NaN in the training rows so the trees learn a missing-value side
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(400, 6))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=400) > 0).astype(int)
+    if n_classes > 2:
+        y = y + (X[:, 3] > 0.5)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    model = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=seed)
+    return model.fit(X, y)
+
+
+def sample_rows(n=500, seed=1):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 6))
+    X[rng.random(X.shape) < 0.2] = np.nan
+    # Whole rows missing
+    X[:5] = np.nan
+    return X
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_parity_with_missing_values(n_classes):
+    model = fit_forest(n_classes)
+    compiled = CompiledForest(model)
+    assert check_parity(model, compiled, sample_rows())
+
+
+def test_parity_on_thresholds():
+    model = fit_forest()
+    thresholds = model.estimators_[0].tree_.threshold
+    # Leaves carry -2 and missing-value-only splits inf
+    X = np.tile(thresholds[np.isfinite(thresholds) & (thresholds != -2)][:, None], (1, 6))
+    assert check_parity(model, CompiledForest(model), X)
+
+
+def test_parity_across_blocks():
+    model = fit_forest()
+    # Rows spread over several blocks, the last one partial
+    compiled = CompiledForest(model, block_rows=64)
+    assert check_parity(model, compiled, sample_rows(n=300))
+
+
+def test_saved_tables_round_trip(tmp_path):
+    model = fit_forest(n_classes=3)
+    model_path = str(tmp_path / "model.pkl")
+    save_model(model, model_path)
+    save_tables(CompiledForest(model), model_path)
+
+    loaded = load_forest(model_path)
+    assert loaded.estimator is None
+    assert isinstance(loaded.threshold, np.ndarray) and not loaded.threshold.flags.writeable
+    assert check_parity(model, loaded, sample_rows())
+
+
+def test_large_calls_use_sklearn(tmp_path):
+    model = fit_forest()
+    model_path = str(tmp_path / "model.pkl")
+    save_model(model, model_path)
+    save_tables(CompiledForest(model), model_path)
+
+    loaded = load_forest(model_path)
+    X = sample_rows(n=loaded.max_rows + 1)
+    np.testing.assert_array_equal(loaded.predict(X[:loaded.max_rows]), model.predict(X[:loaded.max_rows]))
+    assert loaded.estimator is None
+    # Above max_rows the forest is unpickled from the artifact and predicts instead
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
+    assert loaded.estimator is not None
+
+
+def test_stale_tables_are_ignored(tmp_path):
+    model_path = str(tmp_path / "model.pkl")
+    save_model(fit_forest(), model_path)
+    save_tables(CompiledForest(fit_forest()), model_path)
+    # Rewriting the artifact changes its version
+    os.utime(model_path, ns=(0, 0))
+    assert load_tables(model_path) is None
+
+
+def test_rejects_multi_output():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(50, 3))
+    model = RandomForestClassifier(n_estimators=2, random_state=0).fit(X, np.column_stack([X[:, 0] > 0, X[:, 1] > 0]))
+    with pytest.raises(ValueError):
+        CompiledForest(model)
@@ -0,0 +1,67 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "fast_api"))
+
+from rollups import rebuild_start, refresh_rollups  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, state, newest, executed):
+        self.state = state
+        self.newest = newest
+        self.executed = executed
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        if "FROM prediction_rollup_state" in query:
+            self.result = self.state
+        elif "max(timestamp)" in query:
+            self.result = (self.newest,)
+
+    def fetchone(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, state, newest):
+        self.state = state
+        self.newest = newest
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self.state, self.newest, self.executed)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_rebuild_start_reaches_back_by_the_lag():
+    assert rebuild_start("hour", datetime(2026, 3, 1, 11, 0, 1), lag=900) == datetime(2026, 3, 1, 10)
+    assert rebuild_start("hour", datetime(2026, 3, 1, 11, 30), lag=900) == datetime(2026, 3, 1, 11)
+    assert rebuild_start("day", datetime(2026, 3, 2, 0, 5), lag=900) == datetime(2026, 3, 1)
+
+
+def test_late_committing_row_is_rebuilt():
+    # The previous refresh saw rows up to 11:00:01. A group commit whose
+    # transaction started at 10:58 commits afterwards; its rows carry 10:58.
+    watermark = datetime(2026, 3, 1, 11, 0, 1)
+    late_row = datetime(2026, 3, 1, 10, 58)
+    conn = FakeConnection((watermark, watermark), newest=datetime(2026, 3, 1, 11, 4))
+
+    result = refresh_rollups(conn, daily=False, lag=900)
+
+    assert result["since"]["hour"] <= late_row
+    deletes = [params for query, params in conn.executed if query.startswith("DELETE")]
+    assert deletes and all(since <= late_row for _, since in deletes)